@@ -0,0 +1,206 @@
+# analysis_cache.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", ".analysis_cache.sqlite3")
+MEMORY_ITEMS = int(os.getenv("ANALYSIS_CACHE_MEMORY_ITEMS", "128"))
+MAX_DISK_ITEMS = int(os.getenv("ANALYSIS_CACHE_MAX_ITEMS", "5000"))
+TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+ACCESS_FLUSH_SECONDS = 30
+
+
+def normalize_text(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def make_key(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, path=CACHE_PATH, memory_items=MEMORY_ITEMS, max_items=MAX_DISK_ITEMS, ttl_seconds=TTL_SECONDS, table="analysis"):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.table = table
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._touched = {}
+        self._last_flush = 0.0
+        self.counters = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "writes": 0, "evictions": 0}
+        metrics.register_collector(self._collect)
+
+    def _collect(self):
+        stats = self.stats()
+        samples = [(f"cache_{name}_total", {"cache": self.table}, stats[name]) for name in ("hits", "misses", "writes", "evictions")]
+        samples += [("cache_items", {"cache": self.table, "tier": "memory"}, stats["memory_items"]), ("cache_items", {"cache": self.table, "tier": "disk"}, stats["disk_items"])]
+        return samples
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key, now):
+        """Record a memory hit; without it the disk LRU would see the hottest entries as the least recently used."""
+        self._touched[key] = now
+        if now - self._last_flush >= ACCESS_FLUSH_SECONDS:
+            try:
+                db = self._db()
+                self._flush_touched(db, now)
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def _flush_touched(self, db, now):
+        self._last_flush = now
+        if self._touched:
+            db.executemany(f"UPDATE {self.table} SET accessed = MAX(accessed, ?) WHERE key = ?", [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def _expired(self, created, now):
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                self.counters["hits"] += 1
+                self.counters["memory_hits"] += 1
+                return json.loads(entry[1])
+            self._memory.pop(key, None)
+            try:
+                db = self._db()
+                row = db.execute(f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                if row is not None and self._expired(row[1], now):
+                    db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    db.commit()
+                    self.counters["evictions"] += 1
+                    row = None
+                if row is not None:
+                    db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+                    db.commit()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self._remember(key, row[1], row[0])
+            self.counters["hits"] += 1
+            self.counters["disk_hits"] += 1
+            return json.loads(row[0])
+
+    def get_many(self, keys) -> dict:
+        now = time.time()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    found[key] = json.loads(entry[1])
+                    self.counters["memory_hits"] += 1
+                else:
+                    missing.append(key)
+            try:
+                db = self._db()
+                for i in range(0, len(missing), 500):
+                    batch = missing[i:i + 500]
+                    rows = db.execute(f"SELECT key, value, created FROM {self.table} WHERE key IN ({','.join('?' * len(batch))})", batch).fetchall()
+                    fresh = [row for row in rows if not self._expired(row[2], now)]
+                    for key, value, created in fresh:
+                        self._remember(key, created, value)
+                        found[key] = json.loads(value)
+                    self.counters["disk_hits"] += len(fresh)
+                    db.executemany(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", [(now, row[0]) for row in fresh])
+                if now - self._last_flush >= ACCESS_FLUSH_SECONDS:
+                    self._flush_touched(db, now)
+                db.commit()
+            except sqlite3.Error:
+                pass
+            self.counters["hits"] += len(found)
+            self.counters["misses"] += len(keys) - len(found)
+        return found
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        now = time.time()
+        rows = [(key, json.dumps(value, ensure_ascii=False), now, now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            for key, payload, _, _ in rows:
+                self._remember(key, now, payload)
+            self.counters["writes"] += len(rows)
+            try:
+                db = self._db()
+                db.executemany(f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)", rows)
+                self._flush_touched(db, now)
+                self._evict(db, now)
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, db, now):
+        if self.ttl_seconds > 0:
+            self.counters["evictions"] += db.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        overflow = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_items
+        if overflow > 0:
+            self.counters["evictions"] += db.execute(f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY accessed ASC LIMIT ?)", (overflow,)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            try:
+                db = self._db()
+                db.execute(f"DELETE FROM {self.table}")
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            try:
+                disk_items = self._db().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            except sqlite3.Error:
+                disk_items = 0
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {**self.counters, "memory_items": len(self._memory), "disk_items": disk_items, "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0}
@@ -5,74 +5,416 @@ import re
 import json
 import docx
 import io
-import pypdfium2 as pdfium
-import google.generativeai as genai
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+import metrics
+from analysis_cache import AnalysisCache, make_key, normalize_text
+from llm_client import MODEL_NAME, LLMConfigError, get_client
+from pdf_extractor import extract_pdf_pages
+from risk_rules import LEVEL_SCORES, RULES_VERSION, analyze_offline, screen_clause, summarize_locally
+
 load_dotenv()
 
 
-def get_text_from_file(uploaded_file):
+FILE_KINDS = {"application/pdf": "pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx", "text/plain": "txt"}
+
+
+def get_text_from_file(uploaded_file, stats=None):
     file_bytes = uploaded_file.getvalue()
     file_type = uploaded_file.type
-    try:
-        if file_type == "application/pdf":
-            doc = pdfium.PdfDocument(file_bytes)
-            text = "".join(page.get_textpage().get_text_range() + "\n" for page in doc)
-            return text
-        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            doc = docx.Document(io.BytesIO(file_bytes))
-            text = "\n".join(para.text for para in doc.paragraphs)
-            return text
-        elif file_type == "text/plain":
-            return file_bytes.decode('utf-8')
-        else:
-            return f"Error: Unsupported file type '{file_type}'."
-    except Exception as e:
-        return f"Error processing file: {e}"
-
-
-def get_ai_analysis(raw_text: str, language: str = 'en') -> dict:
-    def _segment_into_clauses(full_text):
-        if not isinstance(full_text, str): return []
-        pattern = r'\n\s*\d+\.\s'
-        matches = re.finditer(pattern, full_text)
-        start_indices = [match.start() for match in matches]
-        if not start_indices: return [full_text.strip()] if len(full_text.strip()) > 20 else []
-        clauses = []
-        preamble = full_text[:start_indices[0]].strip()
-        if len(preamble) > 20: clauses.append(preamble)
-        for i in range(len(start_indices) - 1):
-            start, end = start_indices[i], start_indices[i+1]
-            clause_text = full_text[start:end].strip()
-            if len(clause_text) > 20: clauses.append(clause_text)
-        last_clause_text = full_text[start_indices[-1]:].strip()
-        if len(last_clause_text) > 20: clauses.append(last_clause_text)
-        return clauses
-
-    def _get_llm_json(clauses_list, language):
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key: return {"error": "Google API key not found."}
-        genai.configure(api_key=api_key)
-        full_contract_text = "\n\n".join(clauses_list)
-        lang_map = {'en': 'English', 'hi': 'Hindi'}
-        lang_name = lang_map.get(language, "English")
-        
-        system_prompt = f"""
-        You are an expert AI legal assistant for Indian SMBs. Your task is to analyze a contract from an Indian SMB owner's perspective. The contract is in {lang_name}, and your analysis must also be in {lang_name}.
-        You MUST provide your output in a single, valid JSON object.
-        The JSON object must contain "summary_analysis" and "clause_analysis" keys.
-        "summary_analysis": An object containing "contract_type", "involved_parties", "important_dates" (a list of objects, each with "date" and "context" keys), "sections_summary" (a list of objects, each with "section_name" and "simple_explanation" keys), "overall_risk_score" (1-100), "executive_summary", "key_risk_areas".
-        "clause_analysis": A list of objects, each containing "risk_level" ("High", "Medium", or "Low"), "explanation", "identified_issue", "mitigation_suggestion".
-        """
-        
-        generation_config = {"response_mime_type": "application/json", "max_output_tokens": 8192}
-        model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_prompt, generation_config=generation_config)
+    with metrics.span("extract", file_type=FILE_KINDS.get(file_type, "other")):
         try:
-            response = model.generate_content(f"Please analyze the following contract text:\n\n---\n{full_contract_text}\n---")
-            return json.loads(response.text)
+            if file_type == "application/pdf":
+                return "".join(page + "\n" for page in extract_pdf_pages(file_bytes, stats=stats))
+            elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+                doc = docx.Document(io.BytesIO(file_bytes))
+                text = "\n".join(para.text for para in doc.paragraphs)
+                return text
+            elif file_type == "text/plain":
+                return file_bytes.decode('utf-8')
+            else:
+                return f"Error: Unsupported file type '{file_type}'."
         except Exception as e:
-            return {"error": f"An error occurred during LLM analysis: {e}"}
+            return f"Error processing file: {e}"
+
+
+PROMPT_VERSION = "5"
+CLAUSE_CACHE_MAX_ITEMS = int(os.getenv("CLAUSE_CACHE_MAX_ITEMS", "100000"))
+CHUNK_TOKEN_BUDGET = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "6000"))
+MAX_OUTPUT_TOKENS = 8192
+# Every clause gets its own explanation, issue and mitigation (roughly 250 output tokens), so the reply grows with the clause count, not the input size.
+CHUNK_MAX_CLAUSES = int(os.getenv("ANALYSIS_CHUNK_MAX_CLAUSES", "25"))
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "4"))
+RULES_PRESCREEN = os.getenv("RULES_PRESCREEN", "1") == "1"
+ANALYSIS_OFFLINE = os.getenv("ANALYSIS_OFFLINE", "0") == "1"
+ANALYSIS_OFFLINE_FALLBACK = os.getenv("ANALYSIS_OFFLINE_FALLBACK", "1") == "1"
+
+_analysis_cache = AnalysisCache()
+_clause_cache = AnalysisCache(memory_items=2048, max_items=CLAUSE_CACHE_MAX_ITEMS, table="clauses")
+
+
+def _segment_into_clauses(full_text):
+    if not isinstance(full_text, str): return []
+    pattern = r'\n\s*\d+\.\s'
+    matches = re.finditer(pattern, full_text)
+    start_indices = [match.start() for match in matches]
+    if not start_indices: return [full_text.strip()] if len(full_text.strip()) > 20 else []
+    clauses = []
+    preamble = full_text[:start_indices[0]].strip()
+    if len(preamble) > 20: clauses.append(preamble)
+    for i in range(len(start_indices) - 1):
+        start, end = start_indices[i], start_indices[i+1]
+        clause_text = full_text[start:end].strip()
+        if len(clause_text) > 20: clauses.append(clause_text)
+    last_clause_text = full_text[start_indices[-1]:].strip()
+    if len(last_clause_text) > 20: clauses.append(last_clause_text)
+    return clauses
+
+
+def _drain(generator):
+    while True:
+        try: next(generator)
+        except StopIteration as stop: return stop.value
+
+
+class PartialJSONParser:
+    """Incrementally parse a streamed JSON object; each fed character is scanned once across chunks."""
+
+    def __init__(self):
+        self.value, self._chunks, self._length = None, [], 0
+        self._stack, self._in_string, self._escaped, self._cut, self._parsed_cut = [], False, False, None, None
+
+    def feed(self, chunk: str):
+        """Append a chunk and return the longest prefix that ends on a complete top-level field or list item."""
+        stack, in_string, escaped, cut = self._stack, self._in_string, self._escaped, self._cut
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        for i, ch in enumerate(chunk, offset):
+            if in_string:
+                if escaped: escaped = False
+                elif ch == "\\": escaped = True
+                elif ch == '"': in_string = False
+                continue
+            if ch == '"': in_string = True
+            elif ch in "{[":
+                stack.append("}" if ch == "{" else "]")
+                if len(stack) == 1: cut = (i + 1, "".join(reversed(stack)))
+            elif ch in "}]":
+                if stack: stack.pop()
+                if len(stack) <= 2: cut = (i + 1, "".join(reversed(stack)))
+            elif ch == "," and len(stack) <= 2:
+                cut = (i, "".join(reversed(stack)))
+        self._in_string, self._escaped, self._cut = in_string, escaped, cut
+        # Only re-parse when the cut has moved; chunks inside a list item leave the result unchanged.
+        if cut is not None and cut != self._parsed_cut:
+            self._parsed_cut = cut
+            try:
+                self.value = json.loads(self.text[:cut[0]] + cut[1])
+            except json.JSONDecodeError:
+                pass
+        return self.value
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+
+def parse_partial_json(text: str):
+    """Parse the longest prefix of a streamed JSON object that ends on a complete top-level field or list item."""
+    return PartialJSONParser().feed(text)
+
+
+def _stream_llm_json(clauses_list, language, clause_ids=None, context_notes=None, part=None, stream=True):
+    if clause_ids is None: clause_ids = list(range(1, len(clauses_list) + 1))
+    full_contract_text = "\n\n".join(f"[Clause {clause_id}]\n{clause}" for clause_id, clause in zip(clause_ids, clauses_list))
+    lang_map = {'en': 'English', 'hi': 'Hindi'}
+    lang_name = lang_map.get(language, "English")
+    
+    system_prompt = f"""
+    You are an expert AI legal assistant for Indian SMBs. Your task is to analyze a contract from an Indian SMB owner's perspective. The contract is in {lang_name}, and your analysis must also be in {lang_name}.
+    You MUST provide your output in a single, valid JSON object.
+    The JSON object must contain "summary_analysis" and "clause_analysis" keys.
+    "summary_analysis": An object containing "contract_type", "involved_parties", "important_dates" (a list of objects, each with "date" and "context" keys), "sections_summary" (a list of objects, each with "section_name" and "simple_explanation" keys), "overall_risk_score" (1-100), "executive_summary", "key_risk_areas".
+    "clause_analysis": A list with exactly one object per supplied clause, each containing "clause_id" (the number from the clause's [Clause N] marker), "risk_level" ("High", "Medium", or "Low"), "explanation", "identified_issue", "mitigation_suggestion".
+    When notes are included with the contract text, follow them.
+    """
+    notes = ""
+    if context_notes:
+        notes += f"""
+    Some clauses of this contract have already been reviewed and are not supplied below; their findings are listed here.
+    Return "clause_analysis" for the supplied clauses only, and a "summary_analysis" for the whole contract that also takes these findings into account.
+    {context_notes}
+    """
+    if part:
+        notes += f"""
+    The clauses below are part {part[0]} of {part[1]} of a longer contract that is being analyzed in parallel. Base "summary_analysis" only on the clauses supplied, and score "overall_risk_score" for this part alone.
+    """
+    prompt = f"Please analyze the following contract text:\n\n---\n{full_contract_text}\n---"
+    if notes: prompt = f"Notes:{notes}\n{prompt}"
+    
+    generation_config = {"response_mime_type": "application/json", "max_output_tokens": MAX_OUTPUT_TOKENS}
+    try:
+        response = get_client().generate(prompt, system_instruction=system_prompt, generation_config=generation_config, model_name=MODEL_NAME, stream=stream)
+        if not stream:
+            with metrics.span("parse_json"):
+                return json.loads(response)
+        parser, last = PartialJSONParser(), None
+        for text in response:
+            with metrics.span("parse_partial_json"):
+                partial = parser.feed(text)
+            if isinstance(partial, dict) and partial != last:
+                last = partial
+                yield partial
+        with metrics.span("parse_json"):
+            return json.loads(parser.text)
+    except LLMConfigError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"An error occurred during LLM analysis: {e}"}
+
+
+def _get_llm_json(clauses_list, language, clause_ids=None, context_notes=None, part=None):
+    return _drain(_stream_llm_json(clauses_list, language, clause_ids, context_notes, part, stream=False))
+
+
+def _estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def _batch_clauses(clauses_list, clause_ids, token_budget=CHUNK_TOKEN_BUDGET, max_clauses=CHUNK_MAX_CLAUSES):
+    batches, current, current_ids, current_tokens = [], [], [], 0
+    for clause, clause_id in zip(clauses_list, clause_ids):
+        tokens = _estimate_tokens(clause)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_clauses):
+            batches.append((current, current_ids))
+            current, current_ids, current_tokens = [], [], 0
+        current.append(clause); current_ids.append(clause_id); current_tokens += tokens
+    if current: batches.append((current, current_ids))
+    return batches
+
+
+def _unique(items, key=lambda item: item):
+    seen, unique = set(), []
+    for item in items:
+        marker = key(item)
+        if isinstance(marker, str): marker = marker.strip().casefold()
+        if marker in seen: continue
+        seen.add(marker); unique.append(item)
+    return unique
+
+
+def _as_list(value):
+    if value is None: return []
+    return value if isinstance(value, list) else [value]
+
+
+def _reduce_analyses(partials, weights, known=None):
+    """Merge per-part analyses mechanically; weights are the clause counts of each part, and known findings score by risk level."""
+    summaries = [p.get("summary_analysis", {}) or {} for p in partials]
+    scored = [(LEVEL_SCORES.get(item.get("risk_level"), 50), 1) for item in (known or {}).values()]
+    for summary, weight in zip(summaries, weights):
+        try: scored.append((float(summary.get("overall_risk_score")), weight))
+        except (TypeError, ValueError): pass
+    total_weight = sum(weight for _, weight in scored)
+    overall = round(sum(score * weight for score, weight in scored) / total_weight) if total_weight else 0
+    contract_types = [s.get("contract_type") for s in summaries if s.get("contract_type")]
+    summary = {
+        "contract_type": Counter(contract_types).most_common(1)[0][0] if contract_types else "N/A",
+        "involved_parties": _unique(p for s in summaries for p in _as_list(s.get("involved_parties")) if isinstance(p, str)),
+        "important_dates": _unique((d for s in summaries for d in _as_list(s.get("important_dates"))), key=lambda d: json.dumps(d, sort_keys=True, ensure_ascii=False)),
+        "sections_summary": _unique((x for s in summaries for x in _as_list(s.get("sections_summary"))), key=lambda x: x.get("section_name", "") if isinstance(x, dict) else x),
+        "overall_risk_score": max(1, min(100, overall)) if scored else 0,
+        "executive_summary": "\n\n".join(_unique(s["executive_summary"] for s in summaries if isinstance(s.get("executive_summary"), str) and s["executive_summary"].strip())),
+        "key_risk_areas": _unique(a for s in summaries for a in _as_list(s.get("key_risk_areas")) if isinstance(a, str)),
+    }
+    clause_analysis = [item for p in partials for item in _as_list(p.get("clause_analysis"))]
+    return {"summary_analysis": summary, "clause_analysis": clause_analysis}
+
+
+def _known_findings_digest(known):
+    counts = Counter(item.get("risk_level", "N/A") for item in known.values())
+    issues = _unique(item.get("identified_issue", "") for item in known.values() if item.get("risk_level") in ("High", "Medium") and item.get("identified_issue"))
+    return f"{len(known)} further clauses were reviewed separately: {counts.get('High', 0)} High, {counts.get('Medium', 0)} Medium, {counts.get('Low', 0)} Low risk. Issues found there: {'; '.join(issues) or 'none'}."
+
+
+def _reduce_summary(summaries, language, known=None):
+    """Ask the model for one summary of the whole contract from the per-part summaries; None if that call fails."""
+    lang_name = {'en': 'English', 'hi': 'Hindi'}.get(language, "English")
+    system_prompt = f"""
+    You are an expert AI legal assistant for Indian SMBs. You are given the summaries of consecutive parts of one contract, analyzed separately. Combine them into a single summary of the whole contract, in {lang_name}.
+    You MUST provide your output in a single, valid JSON object with a "summary_analysis" key containing "contract_type", "involved_parties", "executive_summary" (one summary for the whole contract, not one per part) and "key_risk_areas".
+    """
+    parts = [{key: summary.get(key) for key in ("contract_type", "involved_parties", "executive_summary", "key_risk_areas")} for summary in summaries]
+    prompt = f"Part summaries, in contract order:\n{json.dumps(parts, ensure_ascii=False)}"
+    if known: prompt += f"\n\n{_known_findings_digest(known)}"
+    try:
+        response = get_client().generate(prompt, system_instruction=system_prompt, generation_config={"response_mime_type": "application/json"}, model_name=MODEL_NAME)
+        with metrics.span("parse_json"):
+            summary = json.loads(response).get("summary_analysis")
+    except Exception:
+        return None
+    return summary if isinstance(summary, dict) else None
+
+
+def _stream_llm_json_chunked(clauses_list, language, clause_ids=None, context_notes=None, known=None, stream=True):
+    if clause_ids is None: clause_ids = list(range(1, len(clauses_list) + 1))
+    batches = _batch_clauses(clauses_list, clause_ids)
+    if len(batches) <= 1:
+        return (yield from _stream_llm_json(clauses_list, language, clause_ids, context_notes, stream=stream))
+    # Each part sees only its own clauses; known findings and the summary are folded in once, in the reduce step.
+    weights = [len(ids) for _, ids in batches]
+    partials = [None] * len(batches)
+    with ThreadPoolExecutor(max_workers=max(1, ANALYSIS_MAX_WORKERS)) as pool:
+        futures = {pool.submit(_get_llm_json, texts, language, ids, None, (n + 1, len(batches))): n for n, (texts, ids) in enumerate(batches)}
+        for future in as_completed(futures):
+            partials[futures[future]] = future.result()
+            done = [n for n, partial in enumerate(partials) if partial is not None and "error" not in partial]
+            if stream and len(done) < len(batches):
+                yield _reduce_analyses([partials[n] for n in done], [weights[n] for n in done], known)
+    for partial in partials:
+        if "error" in partial: return partial
+    result = _reduce_analyses(partials, weights, known)
+    if stream: yield result
+    summary = _reduce_summary([p.get("summary_analysis", {}) or {} for p in partials], language, known)
+    if summary:
+        merged = result["summary_analysis"]
+        result["summary_analysis"] = {**merged, **{key: summary[key] for key in ("contract_type", "involved_parties", "executive_summary", "key_risk_areas") if summary.get(key)}}
+    return result
+
+
+def _get_llm_json_chunked(clauses_list, language, clause_ids=None, context_notes=None, known=None):
+    return _drain(_stream_llm_json_chunked(clauses_list, language, clause_ids, context_notes, known, stream=False))
+
+
+_CLAUSE_NUMBER_RE = re.compile(r"^\s*\d+\.\s*")
+
+
+def _fingerprint_clause(clause, language):
+    # Leave out the clause number so inserting or deleting a clause does not invalidate every clause after it.
+    return make_key(normalize_text(_CLAUSE_NUMBER_RE.sub("", clause, count=1)), language, MODEL_NAME, PROMPT_VERSION)
+
+
+def _match_clause_results(result, clause_ids):
+    items = [item for item in result.get("clause_analysis", []) if isinstance(item, dict)]
+    by_id = {}
+    for item in items:
+        try: by_id[int(item.get("clause_id"))] = item
+        except (TypeError, ValueError): pass
+    if all(clause_id in by_id for clause_id in clause_ids):
+        return [by_id[clause_id] for clause_id in clause_ids]
+    if len(items) == len(clause_ids):
+        return items
+    return None
+
+
+def _build_context_notes(previous_summary, known):
+    findings = "\n".join(f"    [Clause {i + 1}] {item.get('risk_level', 'N/A')}: {item.get('identified_issue', 'N/A')}" for i, item in sorted(known.items()))
+    notes = f"""Findings for the clauses not supplied:
+{findings or "    (none)"}"""
+    if previous_summary is not None:
+        notes = f"""This is a revised version of a contract you have already analyzed. Previous summary_analysis: {json.dumps(previous_summary, ensure_ascii=False)}
+    """ + notes
+    return notes
+
+
+def _clause_order(item):
+    try: return int(item.get("clause_id"))
+    except (TypeError, ValueError): return float("inf")
+
+
+def _with_known_clauses(generator, known):
+    while True:
+        try: partial = next(generator)
+        except StopIteration as stop: return stop.value
+        items = list(known.values()) + [item for item in _as_list(partial.get("clause_analysis")) if isinstance(item, dict)]
+        yield {**partial, "clause_analysis": sorted(items, key=_clause_order)}
+
+
+def _stream_screened(clauses, language, reused, previous_summary=None, stream=True):
+    pending = [i for i in range(len(clauses)) if i not in reused]
+    decided = {}
+    if RULES_PRESCREEN:
+        for i in pending:
+            finding, is_decided = screen_clause(clauses[i])
+            if is_decided: decided[i] = {**finding, "clause_id": i + 1}
+    ambiguous = [i for i in pending if i not in decided]
+    known = {**reused, **decided}
+    if not ambiguous and previous_summary is None:
+        findings = [known[i] for i in range(len(clauses))]
+        return {"summary_analysis": summarize_locally(clauses, findings), "clause_analysis": findings}
+    notes = _build_context_notes(previous_summary, known) if known else None
+    generator = _stream_llm_json_chunked([clauses[i] for i in ambiguous], language, clause_ids=[i + 1 for i in ambiguous], context_notes=notes, known=known, stream=stream)
+    result = yield from _with_known_clauses(generator, known)
+    if "error" in result:
+        return result
+    fresh = _match_clause_results(result, [i + 1 for i in ambiguous])
+    if fresh is None:
+        return {**result, "clause_analysis": sorted(list(known.values()) + [item for item in _as_list(result.get("clause_analysis")) if isinstance(item, dict)], key=_clause_order)}
+    merged = dict(known)
+    for i, item in zip(ambiguous, fresh):
+        item["clause_id"] = i + 1
+        merged[i] = item
+    return {"summary_analysis": result.get("summary_analysis", {}), "clause_analysis": [merged[i] for i in range(len(clauses))]}
+
+
+def _stream_incremental(clauses, language, document_key, stream=True):
+    fingerprints = [_fingerprint_clause(clause, language) for clause in clauses]
+    cached_by_key = _clause_cache.get_many(fingerprints)
+    cached = [cached_by_key.get(fingerprint) for fingerprint in fingerprints]
+    previous_documents = [entry["document"] for entry in cached if entry]
+    previous = _analysis_cache.get(max(set(previous_documents), key=previous_documents.count)) if previous_documents else None
+    reused = {i: {**entry["result"], "clause_id": i + 1} for i, entry in enumerate(cached) if entry} if previous else {}
+    previous_summary = previous.get("summary_analysis", {}) if previous else None
+    result = yield from _stream_screened(clauses, language, reused, previous_summary, stream=stream)
+    by_id = {_clause_order(item): item for item in _as_list(result.get("clause_analysis")) if isinstance(item, dict)}
+    # Only cache when every clause has its own finding; an unmatched model reply would shift findings onto the wrong clauses.
+    if "error" not in result and all(i + 1 in by_id for i in range(len(clauses))):
+        _clause_cache.set_many((fingerprints[i], {"result": by_id[i + 1], "document": document_key}) for i in range(len(clauses)) if by_id[i + 1].get("source") != "rules")
+    return result
+
+
+def analysis_key(raw_text: str, language: str = 'en') -> str:
+    """Key of a whole-document analysis; it changes whenever the model, prompt or rules would give a different result."""
+    return make_key(normalize_text(raw_text), language, MODEL_NAME, PROMPT_VERSION, RULES_VERSION if RULES_PRESCREEN else "")
+
+
+def _stream_analysis(raw_text, language, use_cache, stream, offline=None):
+    with metrics.span("segment"):
+        clauses = _segment_into_clauses(raw_text)
+    if not clauses:
+        return {"error": "No text could be extracted from the document. If it is a scanned PDF, upload a version with selectable text."}
+    if ANALYSIS_OFFLINE if offline is None else offline:
+        return analyze_offline(clauses)
+    if not use_cache or not isinstance(raw_text, str) or not clauses:
+        result = yield from _stream_screened(clauses, language, {}, stream=stream)
+    else:
+        cache_key = analysis_key(raw_text, language)
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = yield from _stream_incremental(clauses, language, cache_key, stream=stream)
+        if "error" not in result:
+            _analysis_cache.set(cache_key, result)
+    if "error" in result and ANALYSIS_OFFLINE_FALLBACK:
+        return {**analyze_offline(clauses), "notice": f"AI analysis was unavailable ({result['error']}). Showing the offline rule-based screening instead."}
+    return result
+
+
+def get_cache_stats() -> dict:
+    return {**_analysis_cache.stats(), "clauses": _clause_cache.stats(), "llm": get_client().stats()}
+
+
+def get_ai_analysis(raw_text: str, language: str = 'en', use_cache: bool = True, offline: bool = None) -> dict:
+    with metrics.span("analysis"):
+        return _drain(_stream_analysis(raw_text, language, use_cache, stream=False, offline=offline))
+
 
-    clauses = _segment_into_clauses(raw_text)
-    return _get_llm_json(clauses, language)
\ No newline at end of file
+def stream_ai_analysis(raw_text: str, language: str = 'en', use_cache: bool = True, offline: bool = None):
+    """Yield partial analysis dicts while the model is still generating; the last item is the final result."""
+    def _run():
+        result = yield from _stream_analysis(raw_text, language, use_cache, stream=True, offline=offline)
+        yield result
+    yield from metrics.timed_iter(_run(), "analysis", first_stage="analysis_first_result")
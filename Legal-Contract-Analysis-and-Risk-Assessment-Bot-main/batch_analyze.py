@@ -0,0 +1,184 @@
+# batch_analyze.py
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import mimetypes
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from langdetect import detect, LangDetectException
+
+import metrics
+from backend import get_ai_analysis, get_text_from_file
+from llm_client import get_client
+
+SUPPORTED_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain",
+}
+
+
+class LocalFile:
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.type = SUPPORTED_TYPES.get(os.path.splitext(path)[1].lower()) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    def getvalue(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def detect_language(text: str) -> str:
+    try:
+        return 'hi' if detect(text) != 'en' else 'en'
+    except LangDetectException:
+        return 'en'
+
+
+def collect_paths(inputs, manifest=None):
+    paths = []
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            paths.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in sorted(files) if os.path.splitext(name)[1].lower() in SUPPORTED_TYPES)
+        else:
+            paths.append(item)
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def load_completed(output_path):
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(record.get("path"))
+    return completed
+
+
+def drop_partial_line(output_path):
+    """Truncate a last line that a crash left unterminated, so the next record starts on a line of its own."""
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        end = position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            step = min(65536, position)
+            f.seek(position - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                position += newline + 1 - step
+                break
+            position -= step
+        if position < end:
+            f.truncate(position)
+
+
+def _extract(path):
+    started = time.perf_counter()
+    try:
+        local_file = LocalFile(path)
+        file_bytes = local_file.getvalue()
+        text = get_text_from_file(local_file)
+    except OSError as e:
+        return {"path": path, "status": "error", "error": f"Error reading file: {e}"}
+    record = {"path": path, "sha256": hashlib.sha256(file_bytes).hexdigest(), "extract_seconds": round(time.perf_counter() - started, 3)}
+    if not text or text.startswith("Error"):
+        return {**record, "status": "error", "error": text or "No text could be extracted."}
+    return {**record, "text": text}
+
+
+def _analyze(record):
+    started = time.perf_counter()
+    text = record.pop("text")
+    with metrics.span("language_detect"):
+        language = detect_language(text)
+    analysis = get_ai_analysis(text, language=language)
+    record.update(language=language, analyze_seconds=round(time.perf_counter() - started, 3))
+    if "error" in analysis:
+        return {**record, "status": "error", "error": analysis["error"]}
+    if analysis.get("notice"):
+        # The offline fallback stands in for a failed AI analysis; keep it, but let the next resume retry the file.
+        return {**record, "status": "degraded", "error": analysis["notice"], "analysis": analysis}
+    return {**record, "status": "ok", "analysis": analysis}
+
+
+def run_batch(paths, output_path, extract_workers=None, llm_workers=4, requests_per_minute=60, resume=True, log=sys.stderr):
+    if resume: drop_partial_line(output_path)
+    completed = load_completed(output_path) if resume else set()
+    todo = [path for path in paths if path not in completed]
+    print(f"{len(paths)} files, {len(paths) - len(todo)} already done, {len(todo)} to process.", file=log)
+    get_client().set_rate_limit(requests_per_minute)
+    counts = {"ok": 0, "degraded": 0, "error": 0}
+    started = time.perf_counter()
+    extract_workers = extract_workers or os.cpu_count() or 1
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=llm_workers) as llm_pool:
+        pending = iter(todo)
+        extracting, analyzing = set(), set()
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            done = sum(counts.values())
+            print(f"[{done}/{len(todo)}] {record['status']}: {record['path']} ({done / (time.perf_counter() - started):.2f} files/s)", file=log)
+
+        def refill():
+            while len(extracting) < extract_workers * 2 and len(analyzing) < llm_workers * 2:
+                path = next(pending, None)
+                if path is None: return
+                extracting.add(extract_pool.submit(_extract, path))
+
+        refill()
+        while extracting or analyzing:
+            done, _ = wait(extracting | analyzing, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    extracting.discard(future)
+                    record = future.result()
+                    if record.get("status") == "error": write(record)
+                    else: analyzing.add(llm_pool.submit(_analyze, record))
+                else:
+                    analyzing.discard(future)
+                    write(future.result())
+            refill()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of contracts (PDF, DOCX, TXT) and stream results to JSONL.")
+    parser.add_argument("inputs", nargs="*", help="Contract files or directories to scan recursively.")
+    parser.add_argument("-m", "--manifest", help="Text file listing one contract path per line.")
+    parser.add_argument("-o", "--output", default="analysis_results.jsonl", help="JSONL file to append results to.")
+    parser.add_argument("--extract-workers", type=int, default=None, help="Processes used for text extraction (default: CPU count).")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent analyses in flight.")
+    parser.add_argument("--rpm", type=float, default=60, help="Maximum LLM requests per minute across all workers (0 for no limit).")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of skipping files already analyzed.")
+    args = parser.parse_args(argv)
+    paths = collect_paths(args.inputs, args.manifest)
+    if not paths:
+        parser.error("no contract files found")
+    metrics.start_exporters()
+    counts = run_batch(paths, args.output, args.extract_workers, args.llm_workers, args.rpm, resume=not args.no_resume)
+    if metrics.METRICS_FILE:
+        metrics.write_prometheus_file(metrics.METRICS_FILE)
+    print(f"Done: {counts['ok']} analyzed, {counts['degraded']} offline fallback only, {counts['error']} failed. Results in {args.output}", file=sys.stderr)
+    return 0 if counts["error"] == 0 and counts["degraded"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# benchmark.py
+
+import os
+import re
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+CHARS_PER_PAGE = 2400
+DEFAULT_PAGES = [1, 10, 50, 200, 500]
+DEFAULT_FORMATS = ["pdf", "docx", "txt"]
+DEFAULT_LANGUAGES = ["en", "hi"]
+DEVANAGARI_FONTS = [
+    "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansDevanagari-Regular.ttf",
+    "/usr/share/fonts/truetype/lohit-devanagari/Lohit-Devanagari.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\mangal.ttf",
+]
+
+CLAUSES = {
+    "en": [
+        "The Service Provider shall perform the services described in Schedule {n} with due skill, care and diligence, and shall deliver each milestone by the dates agreed in writing between the Parties.",
+        "The Client shall pay all undisputed invoices within {days} days of receipt. Late payments shall carry interest at {rate}% per annum from the due date until the date of actual payment.",
+        "The Company may terminate this Agreement at any time without notice and without assigning any reason, and shall not be liable for any compensation arising from such termination.",
+        "The Employee shall indemnify and hold harmless the Company against any and all losses, damages, claims and expenses arising out of or in connection with this Agreement.",
+        "Each Party shall keep confidential all Confidential Information received from the other Party and shall not disclose it to any third party for a period of {years} years after termination.",
+        "This Agreement shall be governed by and construed in accordance with the laws of India, and the courts at {city} shall have exclusive jurisdiction over any dispute.",
+        "This Agreement shall renew automatically for successive periods of {years} year(s) unless either Party gives written notice of non-renewal at least {days} days before expiry.",
+        "The Consultant shall not, directly or indirectly, engage in any business that competes with the Company within {city} for a period of {years} years after the end of the engagement.",
+        "The Vendor warrants that the goods supplied under purchase order {n} shall be free from defects in material and workmanship for {months} months from the date of delivery.",
+        "Notices under this Agreement shall be in writing and delivered by hand, registered post or email to the addresses set out in Schedule {n}, and shall be effective on receipt.",
+        "The Parties shall meet every {months} months to review performance against the service levels, and any shortfall shall be addressed through a remediation plan agreed in good faith.",
+        "Neither Party shall be liable for any failure or delay caused by events beyond its reasonable control, including flood, fire, epidemic, strike or government action.",
+    ],
+    "hi": [
+        "सेवा प्रदाता अनुसूची {n} में वर्णित सेवाओं को उचित कौशल और सावधानी के साथ पूरा करेगा और पक्षों के बीच लिखित रूप में तय तिथियों तक प्रत्येक चरण सौंपेगा।",
+        "ग्राहक प्राप्ति के {days} दिनों के भीतर सभी निर्विवाद चालानों का भुगतान करेगा। विलंबित भुगतान पर नियत तिथि से {rate}% वार्षिक ब्याज देय होगा।",
+        "कंपनी बिना किसी पूर्व सूचना के किसी भी समय इस अनुबंध को समाप्त कर सकती है और ऐसी समाप्ति के लिए कोई मुआवजा देय नहीं होगा।",
+        "कर्मचारी इस अनुबंध से उत्पन्न सभी हानियों, क्षतियों और दावों के लिए कंपनी की क्षतिपूर्ति करेगा।",
+        "प्रत्येक पक्ष दूसरे पक्ष से प्राप्त सभी गोपनीय जानकारी को गोपनीय रखेगा और समाप्ति के {years} वर्ष बाद तक किसी तीसरे पक्ष को प्रकट नहीं करेगा।",
+        "यह अनुबंध भारत के कानूनों द्वारा शासित होगा और किसी भी विवाद पर {city} के न्यायालयों का अनन्य क्षेत्राधिकार होगा।",
+        "यह अनुबंध प्रत्येक {years} वर्ष के लिए स्वतः नवीनीकृत होगा जब तक कि कोई पक्ष समाप्ति से कम से कम {days} दिन पहले लिखित सूचना न दे।",
+        "सलाहकार अनुबंध समाप्त होने के {years} वर्ष बाद तक {city} में प्रतिस्पर्धा नहीं करेगा और कोई प्रतिस्पर्धी व्यवसाय नहीं चलाएगा।",
+        "विक्रेता आश्वासन देता है कि क्रय आदेश {n} के अंतर्गत दिया गया माल डिलीवरी की तिथि से {months} महीनों तक दोषमुक्त रहेगा।",
+        "इस अनुबंध के अंतर्गत सभी सूचनाएं लिखित रूप में अनुसूची {n} में दिए गए पतों पर दस्ती, पंजीकृत डाक या ईमेल द्वारा भेजी जाएंगी।",
+        "पक्ष प्रत्येक {months} महीनों में सेवा स्तरों की समीक्षा के लिए मिलेंगे और किसी भी कमी को सद्भावना से तय सुधार योजना के माध्यम से दूर किया जाएगा।",
+        "कोई भी पक्ष अपने उचित नियंत्रण से बाहर की घटनाओं जैसे बाढ़, आग, महामारी या हड़ताल के कारण हुई देरी के लिए उत्तरदायी नहीं होगा।",
+    ],
+}
+PREAMBLES = {
+    "en": "SERVICE AGREEMENT\nThis Agreement is made between Acme Technologies Private Limited (the Company) and Bharat Consulting Services LLP (the Service Provider).\n",
+    "hi": "सेवा अनुबंध\nयह अनुबंध एक्मे टेक्नोलॉजीज प्राइवेट लिमिटेड (कंपनी) और भारत कंसल्टिंग सर्विसेज एलएलपी (सेवा प्रदाता) के बीच किया गया है।\n",
+}
+CHAT_QUERIES = {
+    "en": ["Can the company terminate without notice?", "What are the payment terms?", "Which courts have jurisdiction?"],
+    "hi": ["क्या कंपनी बिना सूचना के अनुबंध समाप्त कर सकती है?", "भुगतान की शर्तें क्या हैं?", "किस न्यायालय का क्षेत्राधिकार है?"],
+}
+CITIES = ["Mumbai", "New Delhi", "Bengaluru", "Chennai", "Pune", "Hyderabad"]
+
+
+def make_contract_pages(pages: int, language: str = "en", seed: int = 0) -> list:
+    """Return a deterministic synthetic contract as a list of page texts with numbered clauses."""
+    rng = random.Random(f"{seed}-{pages}-{language}")
+    templates, page_texts, number = CLAUSES[language], [], 1
+    for page in range(pages):
+        lines = [PREAMBLES[language]] if page == 0 else []
+        size = sum(len(line) for line in lines)
+        while size < CHARS_PER_PAGE:
+            clause = rng.choice(templates).format(n=number, days=rng.choice([7, 15, 30, 45, 60]), rate=rng.choice([12, 18, 24]), years=rng.randint(1, 5), months=rng.choice([3, 6, 12, 24]), city=rng.choice(CITIES))
+            lines.append(f"{number}. {clause}")
+            size += len(lines[-1])
+            number += 1
+        page_texts.append("\n".join(lines))
+    return page_texts
+
+
+def find_devanagari_font():
+    path = os.getenv("BENCH_DEVANAGARI_FONT")
+    if path and os.path.exists(path): return path
+    return next((candidate for candidate in DEVANAGARI_FONTS if os.path.exists(candidate)), None)
+
+
+def write_pdf(page_texts, path, language="en"):
+    from fpdf import FPDF
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(True, margin=15)
+    if language == "en":
+        pdf.set_font("Helvetica", size=10)
+    else:
+        font_path = find_devanagari_font()
+        if font_path is None:
+            raise RuntimeError("no Devanagari TTF font found; set BENCH_DEVANAGARI_FONT to generate Hindi PDFs")
+        pdf.add_font("Devanagari", "", font_path, uni=True)
+        pdf.set_font("Devanagari", size=10)
+    for text in page_texts:
+        pdf.add_page()
+        for line in text.split("\n"):
+            pdf.multi_cell(0, 5, line)
+    pdf.output(path)
+
+
+def write_docx(page_texts, path):
+    import docx
+    document = docx.Document()
+    for i, text in enumerate(page_texts):
+        if i: document.add_page_break()
+        for line in text.split("\n"):
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def write_txt(page_texts, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(page_texts) + "\n")
+
+
+WRITERS = {"pdf": lambda pages, path, language: write_pdf(pages, path, language), "docx": lambda pages, path, language: write_docx(pages, path), "txt": lambda pages, path, language: write_txt(pages, path)}
+
+
+def build_corpus(corpus_dir, sizes, languages, formats, seed=0, log=sys.stderr):
+    """Generate (or reuse) one file per size/language/format and return the documents plus any skipped combinations."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    documents, skipped = [], []
+    for pages in sizes:
+        for language in languages:
+            page_texts = None
+            for file_format in formats:
+                path = os.path.join(corpus_dir, f"contract_{language}_{pages:04d}p_s{seed}.{file_format}")
+                if not os.path.exists(path):
+                    page_texts = page_texts or make_contract_pages(pages, language, seed)
+                    try:
+                        WRITERS[file_format](page_texts, path, language)
+                    except Exception as e:
+                        if os.path.exists(path): os.remove(path)
+                        skipped.append({"format": file_format, "language": language, "pages": pages, "reason": f"{type(e).__name__}: {e}"})
+                        print(f"Skipping {os.path.basename(path)}: {e}", file=log)
+                        continue
+                    print(f"Generated {os.path.basename(path)}", file=log)
+                documents.append({"path": path, "format": file_format, "language": language, "pages": pages})
+    return documents, skipped
+
+
+def baseline_find_section(text, keywords, next_keywords):
+    """The reformatter's original section search, kept as the reference the reformat stage is measured against."""
+    start_match = re.search(r"(?i)\b(" + "|".join(keywords) + r")\b", text)
+    if not start_match:
+        return ""
+    end_match = re.search(r"(?i)\b(" + "|".join(next_keywords) + r")\b", text[start_match.end():])
+    if end_match:
+        return text[start_match.start():start_match.end() + end_match.start()].strip()
+    return text[start_match.start():].strip()
+
+
+def baseline_reformat(text):
+    body_clauses = re.findall(r"(\n\s*\d+\..+)", text, re.DOTALL)
+    all_headings = ["term", "effective date", "confidentiality", "governing law", "jurisdiction", "dispute resolution", "arbitration"]
+    return [
+        "".join(body_clauses).strip(), baseline_find_section(text, ["parties", "between"], all_headings),
+        baseline_find_section(text, ["governing law", "jurisdiction"], ["dispute resolution", "arbitration"]), baseline_find_section(text, ["dispute resolution", "arbitration"], []),
+    ]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(fn, repeat=3, warmup=1, setup=None):
+    """Time fn() over repeat runs, then run it once more under tracemalloc to record peak Python heap usage."""
+    for _ in range(warmup):
+        if setup: setup()
+        fn()
+    timings = []
+    for _ in range(repeat):
+        if setup: setup()
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    if setup: setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return {
+        "runs": repeat, "p50_ms": round(_percentile(timings, 0.5) * 1000, 3), "p95_ms": round(_percentile(timings, 0.95) * 1000, 3),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3), "min_ms": round(min(timings) * 1000, 3), "peak_mb": round(max(peak, 0) / 2**20, 3),
+    }
+
+
+def _row(stage, document, chars, stats, **extra):
+    seconds = stats["p50_ms"] / 1000 or 1e-9
+    return {
+        "stage": stage, "format": document.get("format", "text"), "language": document["language"], "pages": document["pages"], "chars": chars,
+        **stats, "pages_per_sec": round(document["pages"] / seconds, 2), "mb_per_sec": round(chars / seconds / 2**20, 3), **extra,
+    }
+
+
+def run_benchmarks(documents, stages, repeat=3, warmup=1, llm_latency=0.05, log=sys.stderr):
+    # Imported here so ANALYSIS_CACHE_PATH and the other environment overrides set by main() take effect first.
+    import backend
+    import pdf_extractor
+    from batch_analyze import LocalFile
+    from chatbot import build_clause_index, get_chat_response
+    from llm_client import FakeBackend, get_client, set_backend
+    from reformatter import reformat_contract_as_template
+
+    set_backend(FakeBackend(latency=llm_latency), requests_per_minute=0)
+    results, texts = [], {}
+    for document in documents:
+        local_file = LocalFile(document["path"])
+        if "extract" in stages:
+            stats = measure(lambda: backend.get_text_from_file(local_file), repeat, warmup, setup=pdf_extractor._page_cache.clear)
+            text = backend.get_text_from_file(local_file)
+            results.append(_row("extract", document, len(text), stats, bytes=os.path.getsize(document["path"])))
+            print(f"extract {document['format']} {document['language']} {document['pages']}p: p50 {stats['p50_ms']}ms", file=log)
+        if document["format"] == "txt":
+            texts[(document["pages"], document["language"])] = backend.get_text_from_file(local_file)
+
+    for (pages, language), text in sorted(texts.items()):
+        document = {"format": "text", "language": language, "pages": pages}
+        clauses = backend._segment_into_clauses(text)
+        clause_index = build_clause_index(text)
+        query = CHAT_QUERIES[language][0]
+        stage_fns = {
+            "segment": lambda: backend._segment_into_clauses(text),
+            "index": lambda: build_clause_index(text),
+            "retrieve": lambda: [clause_index.search(q) for q in CHAT_QUERIES[language]],
+            "reformat": lambda: reformat_contract_as_template(text, "Service Agreement", language),
+            "reformat_baseline": lambda: baseline_reformat(text),
+            "analysis": lambda: backend.get_ai_analysis(text, language=language, use_cache=False, offline=False),
+            "analysis_offline": lambda: backend.get_ai_analysis(text, language=language, use_cache=False, offline=True),
+            "chat": lambda: get_chat_response(query, [], text, language, clause_index=clause_index),
+        }
+        for stage, fn in stage_fns.items():
+            if stage not in stages: continue
+            calls_before = get_client().stats()["calls"]
+            stats = measure(fn, repeat, warmup)
+            calls = (get_client().stats()["calls"] - calls_before) / (repeat + warmup + 1)
+            results.append(_row(stage, document, len(text), stats, clauses=len(clauses), llm_calls_per_run=round(calls, 2)))
+            print(f"{stage} {language} {pages}p: p50 {stats['p50_ms']}ms, peak {stats['peak_mb']}MB", file=log)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _result_key(row):
+    return row["stage"], row["format"], row["language"], row["pages"]
+
+
+def compare(baseline_path, results, threshold=0.10, log=sys.stderr):
+    """Print p50 changes against a previous results file and return the rows that slowed down by more than threshold."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {_result_key(row): row for row in json.load(f)["results"]}
+    regressions = []
+    for row in results:
+        old = baseline.get(_result_key(row))
+        if not old or not old["p50_ms"]: continue
+        change = row["p50_ms"] / old["p50_ms"] - 1
+        flag = " REGRESSION" if change > threshold else ""
+        print(f"{row['stage']:<17}{row['format']:<6}{row['language']:<4}{row['pages']:>5}p  {old['p50_ms']:>10.2f}ms -> {row['p50_ms']:>10.2f}ms  {change:+.1%}{flag}", file=log)
+        if flag: regressions.append({**row, "baseline_p50_ms": old["p50_ms"], "change": round(change, 4)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extraction, segmentation, retrieval, reformatting, analysis and chat on a synthetic contract corpus.")
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGES, help="Contract sizes in pages.")
+    parser.add_argument("--languages", nargs="+", default=DEFAULT_LANGUAGES, choices=sorted(CLAUSES), help="Contract languages.")
+    parser.add_argument("--formats", nargs="+", default=DEFAULT_FORMATS, choices=DEFAULT_FORMATS, help="File formats to extract.")
+    parser.add_argument("--stages", nargs="+", default=["extract", "segment", "index", "retrieve", "reformat", "reformat_baseline", "analysis", "analysis_offline", "chat"], help="Stages to measure.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage.")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the fake LLM backend waits per call.")
+    parser.add_argument("--corpus-dir", default="benchmark_corpus", help="Directory the synthetic contracts are generated into (reused across runs).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic corpus.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON file to write results to.")
+    parser.add_argument("--compare", help="Previous results file to compare p50 latencies against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative p50 slowdown reported as a regression.")
+    args = parser.parse_args(argv)
+
+    state_dir = tempfile.mkdtemp(prefix="riskbot-bench-")
+    os.environ["ANALYSIS_CACHE_PATH"] = os.path.join(state_dir, "cache.sqlite3")
+    os.environ["JOBS_DB_PATH"] = os.path.join(state_dir, "jobs.sqlite3")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+    documents, skipped = build_corpus(args.corpus_dir, args.pages, args.languages, args.formats, args.seed)
+    started = time.perf_counter()
+    results = run_benchmarks(documents, set(args.stages), args.repeat, args.warmup, args.llm_latency)
+    import metrics
+    report = {
+        "schema": 1, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "git_commit": git_commit(), "seconds": round(time.perf_counter() - started, 3),
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}, "results": results, "skipped": skipped,
+        "metrics": metrics.snapshot()["counters"],
+    }
+    exit_code = 0
+    if args.compare:
+        report["regressions"] = compare(args.compare, results, args.threshold)
+        exit_code = 1 if report["regressions"] else 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,85 @@
 # chatbot.py
 
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+from clause_index import ClauseIndex
+from llm_client import MODEL_NAME, LLMConfigError, get_client
+import metrics
+
 load_dotenv()
 
-def get_chat_response(query: str, chat_history: list, contract_text: str, language: str = 'en'):
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        return "Chatbot Error: Google API key not found. Please check your .env file."
-    
-    genai.configure(api_key=api_key)
-    
+CHAT_TOP_K = int(os.getenv("CHAT_TOP_K", "5"))
+CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "6"))
+PREAMBLE_CHARS = 800
+
+
+def build_clause_index(contract_text: str) -> ClauseIndex:
+    return ClauseIndex.from_text(contract_text)
+
+
+def _build_context(query, clause_index, top_k=CHAT_TOP_K):
+    with metrics.span("retrieve"):
+        hits = clause_index.search(query, k=top_k)
+    if clause_index.passages and all(i != 0 for i, _ in hits):
+        hits.insert(0, (0, clause_index.passages[0][:PREAMBLE_CHARS]))
+    return "\n\n".join(f"[Excerpt {i + 1}]\n{passage}" for i, passage in hits) or "(No matching clauses were found in the contract.)"
+
+
+def _window_history(chat_history, query, max_messages=CHAT_HISTORY_MESSAGES):
+    history = list(chat_history)
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == query:
+        history = history[:-1]
+    history = history[-max_messages:] if max_messages > 0 else []
+    if history and history[0].get("role") == "assistant":
+        history = history[1:]
+    return history
+
+
+def _build_chat_request(query, chat_history, contract_text, language, clause_index):
     lang_map = {'en': 'English', 'hi': 'Hindi'}
     lang_name = lang_map.get(language, "English")
 
     system_prompt = f"""
-    You are a helpful AI assistant for an Indian SMB owner. Your task is to answer questions about the legal contract provided below.
+    You are a helpful AI assistant for an Indian SMB owner. Your task is to answer questions about a legal contract. Each question comes with the contract excerpts most relevant to it.
 
     **CRITICAL RULES:**
-    1. Base your answers primarily on the text of the contract provided.
+    1. Base your answers primarily on the contract excerpts provided with the question.
     2. If a question is about a legal term or concept mentioned in the contract (e.g., 'Companies Act, 1956'), but not explained in detail, you may use your external knowledge to provide a concise and relevant explanation.
     3. If a question is entirely irrelevant to the contract or asks for information not mentioned, you MUST state: "That information is not available in the document."
     4. Respond to the user in {lang_name}.
-
-    **Full Contract Text:**
-    ---
-    {contract_text}
-    ---
     """
-    
-    model = genai.GenerativeModel(
-        model_name='gemini-1.5-flash',
-        system_instruction=system_prompt
-    )
-
-    gemini_history = []
-    for message in chat_history:
+
+    if clause_index is None:
+        clause_index = build_clause_index(contract_text)
+    prompt = f"**Relevant Contract Excerpts:**\n---\n{_build_context(query, clause_index)}\n---\n\n**Question:** {query}"
+
+    contents = []
+    for message in _window_history(chat_history, query):
         role = "model" if message["role"] == "assistant" else "user"
-        gemini_history.append({"role": role, "parts": [message["content"]]})
+        contents.append({"role": role, "parts": [message["content"]]})
+    contents.append({"role": "user", "parts": [prompt]})
+    return system_prompt, contents
+
+
+def get_chat_response(query: str, chat_history: list, contract_text: str, language: str = 'en', clause_index: ClauseIndex = None):
+    system_prompt, contents = _build_chat_request(query, chat_history, contract_text, language, clause_index)
+    try:
+        with metrics.span("chat"):
+            return get_client().generate(contents, system_instruction=system_prompt, model_name=MODEL_NAME)
+    except LLMConfigError:
+        return "Chatbot Error: Google API key not found. Please check your .env file."
+    except Exception as e:
+        return f"Sorry, an error occurred: {e}"
+
 
+def stream_chat_response(query: str, chat_history: list, contract_text: str, language: str = 'en', clause_index: ClauseIndex = None):
+    system_prompt, contents = _build_chat_request(query, chat_history, contract_text, language, clause_index)
     try:
-        chat = model.start_chat(history=gemini_history)
-        response = chat.send_message(query)
-        return response.text
+        chunks = get_client().generate(contents, system_instruction=system_prompt, model_name=MODEL_NAME, stream=True)
+        for text in metrics.timed_iter(chunks, "chat", first_stage="chat_first_token"):
+            if text: yield text
+    except LLMConfigError:
+        yield "Chatbot Error: Google API key not found. Please check your .env file."
     except Exception as e:
-        return f"Sorry, an error occurred: {e}"
\ No newline at end of file
+        yield f"Sorry, an error occurred: {e}"
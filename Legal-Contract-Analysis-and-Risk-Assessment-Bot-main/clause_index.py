@@ -0,0 +1,83 @@
+# clause_index.py
+
+import re
+import math
+from collections import Counter
+
+from backend import _segment_into_clauses
+
+MAX_PASSAGE_CHARS = 1500
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "has", "have", "how", "i", "if", "in", "is", "it",
+    "its", "me", "my", "of", "on", "or", "shall", "should", "that", "the", "this", "to", "was", "what", "when", "which", "who", "will", "with",
+    "would", "you", "your", "का", "की", "के", "को", "में", "है", "और", "से", "पर", "यह", "क्या",
+}
+_TOKEN_RE = re.compile(r"[\w\u0900-\u097F]+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.;!?\u0964])\s+")
+
+
+def tokenize(text: str) -> list:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _units(passage):
+    """Yield paragraphs with their separators, breaking paragraphs that are too long on sentence ends and then on spaces."""
+    for paragraph in passage.split("\n"):
+        if len(paragraph) < MAX_PASSAGE_CHARS:
+            yield paragraph + "\n"
+            continue
+        sentences = _SENTENCE_END_RE.split(paragraph)
+        for n, sentence in enumerate(sentences, 1):
+            while len(sentence) >= MAX_PASSAGE_CHARS:
+                cut = sentence.rfind(" ", 0, MAX_PASSAGE_CHARS - 1)
+                cut = cut if cut > 0 else MAX_PASSAGE_CHARS - 1
+                yield sentence[:cut] + " "
+                sentence = sentence[cut:].lstrip()
+            yield sentence + ("\n" if n == len(sentences) else " ")
+
+
+def _split_long(passage):
+    if len(passage) <= MAX_PASSAGE_CHARS:
+        return [passage]
+    pieces, current = [], ""
+    for unit in _units(passage):
+        if current and len(current) + len(unit) > MAX_PASSAGE_CHARS:
+            pieces.append(current.strip()); current = ""
+        current += unit
+    if current.strip(): pieces.append(current.strip())
+    return pieces
+
+
+class ClauseIndex:
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._term_freqs = [Counter(tokenize(passage)) for passage in passages]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        doc_freqs = Counter(term for tf in self._term_freqs for term in tf)
+        n = len(passages)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    @classmethod
+    def from_text(cls, contract_text: str):
+        clauses = _segment_into_clauses(contract_text or "")
+        return cls([piece for clause in clauses for piece in _split_long(clause)])
+
+    def scores(self, query: str) -> list:
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        results = []
+        for i, tf in enumerate(self._term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avg_length) if self._avg_length else self.k1
+            for term in terms:
+                freq = tf.get(term)
+                if freq: score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+    def search(self, query: str, k: int = 5) -> list:
+        scores = self.scores(query)
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])[:k]
+        return [(i, self.passages[i]) for i in sorted(ranked)]
@@ -0,0 +1,37 @@
+# conftest.py
+
+import os
+import tempfile
+
+import pytest
+
+# Point every on-disk store at a scratch directory and use the fake LLM before any project module is imported.
+_STATE_DIR = tempfile.mkdtemp(prefix="riskbot-tests-")
+os.environ["ANALYSIS_CACHE_PATH"] = os.path.join(_STATE_DIR, "cache.sqlite3")
+os.environ["JOBS_DB_PATH"] = os.path.join(_STATE_DIR, "jobs.sqlite3")
+os.environ["SESSION_STORE_PATH"] = os.path.join(_STATE_DIR, "session.sqlite3")
+os.environ["LLM_BACKEND"] = "fake"
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+
+@pytest.fixture
+def fake_llm():
+    from llm_client import FakeBackend, set_backend
+
+    def install(**options):
+        backend = FakeBackend(**options)
+        set_backend(backend, requests_per_minute=0, max_retries=0)
+        return backend
+
+    yield install
+    set_backend(FakeBackend(), requests_per_minute=0, max_retries=0)
+
+
+@pytest.fixture
+def fresh_caches():
+    import backend
+    backend._analysis_cache.clear()
+    backend._clause_cache.clear()
+    yield
+    backend._analysis_cache.clear()
+    backend._clause_cache.clear()
@@ -1,13 +1,23 @@
 # frontend.py
 
 import streamlit as st
+import os
 import re
 import plotly.express as px
 from langdetect import detect, LangDetectException
 
-from backend import get_ai_analysis, get_text_from_file
-from chatbot import get_chat_response
-from reformatter import reformat_contract_as_template
+import metrics
+from backend import get_cache_stats, get_text_from_file
+from chatbot import CHAT_HISTORY_MESSAGES, build_clause_index, stream_chat_response
+from jobs import get_job_queue, submit_analysis
+from reformatter import TEMPLATE_TYPES, reformat_contract_as_template
+from session_store import derived_artifact, get_session_store, load_artifact, put_artifact
+
+JOB_POLL_SECONDS = 2
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "0") == "1"
+CHAT_DISPLAY_MESSAGES = int(os.getenv("CHAT_DISPLAY_MESSAGES", "50"))
+
+metrics.start_exporters()
 
 def is_email_valid(email: str) -> bool:
     if not isinstance(email, str) or not email: return False
@@ -21,7 +31,7 @@ def get_password_errors(password: str) -> list:
     if not re.search(r"[!@#$%^&*()]", password): errors.append("contain a special character (e.g., !@#$%)")
     return errors
 def initialize_session_state():
-    defaults = {"authenticated": False, "analysis_result": None, "reformatted_text": None, "messages": [], "contract_text": None, "language": "en"}
+    defaults = {"authenticated": False, "analysis_ref": None, "analysis_job": None, "reformatted_ref": None, "messages": [], "contract_ref": None, "language": "en"}
     for key, value in defaults.items():
         if key not in st.session_state: st.session_state[key] = value
 def login_page():
@@ -43,141 +53,204 @@ def logout():
     initialize_session_state()
     st.session_state.authenticated = False
     st.rerun()
+def render_analysis(analysis: dict, show_chart: bool = True):
+    summary = analysis.get("summary_analysis", {})
+    st.divider()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(label="Total Risk Score", value=f"{summary.get('overall_risk_score', 0)} / 100")
+        st.info(f"**Detected Contract Type:** {summary.get('contract_type', 'N/A')}")
+        st.info(f"**Involved Parties:** {', '.join(summary.get('involved_parties', ['N/A']))}")
+    all_clauses = analysis.get("clause_analysis", [])
+    high_risk = [c for c in all_clauses if "high" in c.get("risk_level", "").lower()]
+    medium_risk = [c for c in all_clauses if "medium" in c.get("risk_level", "").lower()]
+    low_risk = [c for c in all_clauses if "low" in c.get("risk_level", "").lower()]
+    with col2:
+        risk_counts = {"High": len(high_risk), "Medium": len(medium_risk), "Low": len(low_risk)}
+        risk_data = {k: v for k, v in risk_counts.items() if v > 0}
+        if risk_data and show_chart:
+            fig = px.pie(values=risk_data.values(), names=risk_data.keys(), title='Risk Distribution', color=risk_data.keys(), color_discrete_map={'High':'#FF4B4B', 'Medium':'#FFC300', 'Low':'#28A745'})
+            st.plotly_chart(fig, use_container_width=True)
+    st.divider()
+    st.subheader("Executive Summary")
+    st.write(summary.get('executive_summary', 'No summary available.'))
+    st.subheader("Important Dates")
+    important_dates = summary.get('important_dates', [])
+    if important_dates:
+        date_md = ""
+        for item in important_dates:
+            if isinstance(item, dict):
+                date_md += f"- **{item.get('date', 'N/A')}:** {item.get('context', 'N/A')}\n"
+            elif isinstance(item, str):
+                date_md += f"- {item}\n"
+        st.markdown(date_md)
+    else:
+        st.info("No specific dates were mentioned in the document.")
+    st.subheader("Key Sections and Rules at a Glance")
+    sections = summary.get('sections_summary', [])
+    if sections:
+        table_md = "| Section / Rule | Simple Explanation |\n|---|---|\n"
+
+        for section in sections:
+            if isinstance(section, dict):
+
+                section_name = section.get('section_name', 'N/A').replace('\n', ' ')
+                explanation = section.get('simple_explanation', 'No explanation provided.').replace('\n', ' ')
+            elif isinstance(section, str):
+
+                parts = section.split(':', 1) 
+                if len(parts) == 2:
+                    section_name = parts[0].strip()
+                    explanation = parts[1].strip()
+                else:
+                    section_name = section.strip()
+                    explanation = "See first column"
+            else:
+
+                section_name = "Malformed data"
+                explanation = "Skipped"
+            table_md += f"| {section_name} | {explanation} |\n"
+
+        st.markdown(table_md)
+    else:
+        st.info("No specific sections or rules were automatically identified.")
+    st.subheader("Clause-by-Clause Breakdown")
+    if high_risk:
+        st.error("High Risk Clauses")
+        for clause in high_risk:
+            with st.expander(f"**Issue:** {clause.get('identified_issue', 'N/A')}", expanded=True):
+                st.markdown(f"**Explanation:** {clause.get('explanation', 'N/A')}")
+                st.markdown(f"**Mitigation:** {clause.get('mitigation_suggestion', 'N/A')}")
+    if medium_risk:
+        st.warning("Medium Risk Clauses")
+        for clause in medium_risk:
+            with st.expander(f"**Issue:** {clause.get('identified_issue', 'N/A')}"):
+                st.markdown(f"**Explanation:** {clause.get('explanation', 'N/A')}")
+                st.markdown(f"**Mitigation:** {clause.get('mitigation_suggestion', 'N/A')}")
+    if low_risk:
+        st.success("Low Risk Clauses")
+        for clause in low_risk:
+            with st.expander(f"**Issue:** {clause.get('identified_issue', 'No significant issues identified')}"):
+                st.markdown(f"**Explanation:** {clause.get('explanation', 'N/A')}")
+                st.markdown(f"**Mitigation:** {clause.get('mitigation_suggestion', 'N/A')}")
+def load_contract_text():
+    contract_text = load_artifact(st.session_state.contract_ref)
+    if contract_text is None:
+        st.error("This contract is no longer in storage. Please upload the file again.")
+        st.session_state.uploaded_file_name = None
+    return contract_text
+def analysis_job_panel():
+    job = get_job_queue().get(st.session_state.analysis_job)
+    if job is None or job["status"] in ("done", "failed"):
+        st.session_state.analysis_job = None
+        if job is not None:
+            st.session_state.analysis_ref = put_artifact(job["result"] if job["status"] == "done" else {"error": job["error"]})
+        st.rerun()
+    if job["status"] == "queued":
+        st.info(f"Your analysis is queued ({job['queued_seconds']:.0f}s). You can keep chatting or reformatting in the meantime.")
+    else:
+        st.info(f"AI is analyzing your document ({job['elapsed_seconds']:.0f}s). Results appear as they are generated; you can keep using the other tabs.")
+    if job["partial"] and "error" not in job["partial"]:
+        render_analysis(job["partial"], show_chart=False)
+    if not hasattr(st, "fragment"):
+        st.button("Refresh analysis status")
+
+
+if hasattr(st, "fragment"):
+    analysis_job_panel = st.fragment(run_every=JOB_POLL_SECONDS)(analysis_job_panel)
+
+
 def main_app():
     st.set_page_config(page_title="Contract Analysis Bot", layout="wide")
     st.title("GenAI Contract Bot")
     st.write("Analyze risks, reformat drafts, or chat with your documents. Now with Multilingual Support!")
     st.sidebar.title("Actions")
     st.sidebar.button("Logout", on_click=logout)
+    with st.sidebar.expander("Analysis Cache"):
+        cache_stats = get_cache_stats()
+        st.caption(f"Hits: {cache_stats['hits']} | Misses: {cache_stats['misses']} | Hit rate: {cache_stats['hit_rate']:.0%}")
+        st.caption(f"Entries: {cache_stats['memory_items']} in memory, {cache_stats['disk_items']} on disk")
+        st.caption(f"LLM calls: {cache_stats['llm']['calls']} | Retries: {cache_stats['llm']['retries']} | Throttled: {cache_stats['llm']['throttle_seconds']}s")
+        job_stats = get_job_queue().stats()
+        st.caption(f"Jobs: {job_stats['running']} running, {job_stats['queued']} queued, {job_stats['done']} done, {job_stats['failed']} failed")
+        store_stats = get_session_store().stats()
+        st.caption(f"Session store: {store_stats['memory_bytes'] / 2**20:.1f} of {store_stats['memory_budget'] / 2**20:.0f} MB in memory, {store_stats['disk_items']} artifacts on disk ({store_stats['compression_ratio']}x compressed)")
+    if st.sidebar.checkbox("Show performance metrics", value=DEBUG_PANEL):
+        snapshot = metrics.snapshot()
+        with st.sidebar.expander("Performance Metrics", expanded=True):
+            if snapshot["stages"]:
+                stages = sorted(snapshot["stages"].items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+                st.dataframe([{"stage": stage, **values} for stage, values in stages], hide_index=True, use_container_width=True)
+            else:
+                st.caption("No stages recorded yet.")
+            if snapshot["counters"]:
+                st.dataframe([{"counter": name, "value": value} for name, value in sorted(snapshot["counters"].items())], hide_index=True, use_container_width=True)
     uploaded_file = st.file_uploader("Upload your contract to begin (English or Hindi)", type=['pdf', 'docx', 'txt'])
     if uploaded_file is not None:
         if st.session_state.get("uploaded_file_name") != uploaded_file.name:
             st.session_state.uploaded_file_name = uploaded_file.name
             with st.spinner("Reading and extracting text..."):
-                st.session_state.contract_text = get_text_from_file(uploaded_file)
-                if st.session_state.contract_text:
+                extraction_stats = {}
+                contract_text = get_text_from_file(uploaded_file, stats=extraction_stats)
+                st.session_state.contract_ref = put_artifact(contract_text) if contract_text else None
+                st.session_state.extraction_stats = extraction_stats
+                if contract_text:
                     try:
-                        detected_code = detect(st.session_state.contract_text)
+                        with metrics.span("language_detect"):
+                            detected_code = detect(contract_text)
                         st.session_state.language = 'hi' if detected_code != 'en' else 'en'
                     except LangDetectException:
                         st.session_state.language = 'en'
-                st.session_state.analysis_result = None; st.session_state.reformatted_text = None; st.session_state.messages = []
-        if st.session_state.contract_text:
+                del contract_text
+                st.session_state.analysis_ref = None; st.session_state.analysis_job = None; st.session_state.reformatted_ref = None; st.session_state.messages = []
+        if st.session_state.contract_ref:
             lang_map = {'en': 'English', 'hi': 'Hindi'}
             detected_lang_name = lang_map.get(st.session_state.language, "Unknown")
             st.success(f"File '{uploaded_file.name}' is ready. Detected Language: **{detected_lang_name}**.")
+            extraction_stats = st.session_state.get("extraction_stats") or {}
+            if extraction_stats.get("pages"):
+                st.caption(f"Extracted {extraction_stats['pages']} pages ({extraction_stats['cached_pages']} from cache) in {extraction_stats.get('seconds', 0)}s, {extraction_stats.get('pages_per_sec', 0)} pages/sec on {extraction_stats['workers']} worker(s).")
             tab1, tab2, tab3 = st.tabs(["Risk Analysis", "Reformatter", "📄 Chat with Document"])
             with tab1:
                 st.header("Contract Risk Analysis")
-                if st.button("Analyze Risk", type="primary"):
-                    with st.spinner("AI is analyzing your document... This may take a moment."):
-                        st.session_state.analysis_result = get_ai_analysis(st.session_state.contract_text, language=st.session_state.language)
-                if st.session_state.analysis_result:
-                    analysis = st.session_state.analysis_result
+                if st.button("Analyze Risk", type="primary", disabled=bool(st.session_state.analysis_job)) and (contract_text := load_contract_text()) is not None:
+                    st.session_state.analysis_ref = None
+                    st.session_state.analysis_job = submit_analysis(contract_text, language=st.session_state.language)
+                if st.session_state.analysis_job:
+                    analysis_job_panel()
+                analysis = load_artifact(st.session_state.analysis_ref)
+                if analysis:
                     if "error" in analysis:
                         st.error(f"Analysis Failed: {analysis['error']}")
                     else:
                         st.success("Analysis Complete!")
-                        summary = analysis.get("summary_analysis", {})
-                        st.divider()
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric(label="Total Risk Score", value=f"{summary.get('overall_risk_score', 0)} / 100")
-                            st.info(f"**Detected Contract Type:** {summary.get('contract_type', 'N/A')}")
-                            st.info(f"**Involved Parties:** {', '.join(summary.get('involved_parties', ['N/A']))}")
-                        all_clauses = analysis.get("clause_analysis", [])
-                        high_risk = [c for c in all_clauses if "high" in c.get("risk_level", "").lower()]
-                        medium_risk = [c for c in all_clauses if "medium" in c.get("risk_level", "").lower()]
-                        low_risk = [c for c in all_clauses if "low" in c.get("risk_level", "").lower()]
-                        with col2:
-                            risk_counts = {"High": len(high_risk), "Medium": len(medium_risk), "Low": len(low_risk)}
-                            risk_data = {k: v for k, v in risk_counts.items() if v > 0}
-                            if risk_data:
-                                fig = px.pie(values=risk_data.values(), names=risk_data.keys(), title='Risk Distribution', color=risk_data.keys(), color_discrete_map={'High':'#FF4B4B', 'Medium':'#FFC300', 'Low':'#28A745'})
-                                st.plotly_chart(fig, use_container_width=True)
-                        st.divider()
-                        st.subheader("Executive Summary")
-                        st.write(summary.get('executive_summary', 'No summary available.'))
-                        st.subheader("Important Dates")
-                        important_dates = summary.get('important_dates', [])
-                        if important_dates:
-                            date_md = ""
-                            for item in important_dates:
-                                if isinstance(item, dict):
-                                    date_md += f"- **{item.get('date', 'N/A')}:** {item.get('context', 'N/A')}\n"
-                                elif isinstance(item, str):
-                                    date_md += f"- {item}\n"
-                            st.markdown(date_md)
-                        else:
-                            st.info("No specific dates were mentioned in the document.")
-                        st.subheader("Key Sections and Rules at a Glance")
-                        sections = summary.get('sections_summary', [])
-                        if sections:
-                            table_md = "| Section / Rule | Simple Explanation |\n|---|---|\n"
-                            
-                            for section in sections:
-                                if isinstance(section, dict):
-                                    
-                                    section_name = section.get('section_name', 'N/A').replace('\n', ' ')
-                                    explanation = section.get('simple_explanation', 'No explanation provided.').replace('\n', ' ')
-                                elif isinstance(section, str):
-                                    
-                                    parts = section.split(':', 1) 
-                                    if len(parts) == 2:
-                                        section_name = parts[0].strip()
-                                        explanation = parts[1].strip()
-                                    else:
-                                        section_name = section.strip()
-                                        explanation = "See first column"
-                                else:
-                                    
-                                    section_name = "Malformed data"
-                                    explanation = "Skipped"
-                                table_md += f"| {section_name} | {explanation} |\n"
-                            
-                            st.markdown(table_md)
-                        else:
-                            st.info("No specific sections or rules were automatically identified.")
-                        st.subheader("Clause-by-Clause Breakdown")
-                        if high_risk:
-                            st.error("High Risk Clauses")
-                            for clause in high_risk:
-                                with st.expander(f"**Issue:** {clause.get('identified_issue', 'N/A')}", expanded=True):
-                                    st.markdown(f"**Explanation:** {clause.get('explanation', 'N/A')}")
-                                    st.markdown(f"**Mitigation:** {clause.get('mitigation_suggestion', 'N/A')}")
-                        if medium_risk:
-                            st.warning("Medium Risk Clauses")
-                            for clause in medium_risk:
-                                with st.expander(f"**Issue:** {clause.get('identified_issue', 'N/A')}"):
-                                    st.markdown(f"**Explanation:** {clause.get('explanation', 'N/A')}")
-                                    st.markdown(f"**Mitigation:** {clause.get('mitigation_suggestion', 'N/A')}")
-                        if low_risk:
-                            st.success("Low Risk Clauses")
-                            for clause in low_risk:
-                                with st.expander(f"**Issue:** {clause.get('identified_issue', 'No significant issues identified')}"):
-                                    st.markdown(f"**Explanation:** {clause.get('explanation', 'N/A')}")
-                                    st.markdown(f"**Mitigation:** {clause.get('mitigation_suggestion', 'N/A')}")
+                        if analysis.get("notice"): st.warning(analysis["notice"])
+                        render_analysis(analysis)
             with tab2:
                 st.header("Reformat as a Professional Template")
-                template_type = st.selectbox("Select template type:", ("Non-Disclosure Agreement (NDA)", "Service Agreement", "Employment Agreement"), key="template_select")
-                if st.button("📄 Reformat as Template"):
+                template_type = st.selectbox("Select template type:", tuple(TEMPLATE_TYPES), key="template_select")
+                if st.button("📄 Reformat as Template") and (contract_text := load_contract_text()) is not None:
                     with st.spinner("AI is redrafting your document..."):
-                        st.session_state.reformatted_text = reformat_contract_as_template(st.session_state.contract_text, template_type, language=st.session_state.language)
-                if st.session_state.reformatted_text:
-                    st.text_area("Reformatted template:", st.session_state.reformatted_text, height=500)
-                    st.download_button("Download Template", st.session_state.reformatted_text, file_name=f"Reformatted_{template_type.replace(' ', '_')}.txt")
+                        st.session_state.reformatted_ref = put_artifact(reformat_contract_as_template(contract_text, template_type, language=st.session_state.language))
+                reformatted_text = load_artifact(st.session_state.reformatted_ref)
+                if reformatted_text:
+                    st.text_area("Reformatted template:", reformatted_text, height=500)
+                    st.download_button("Download Template", reformatted_text, file_name=f"Reformatted_{template_type.replace(' ', '_')}.txt")
             with tab3:
                 st.header("Chat with Your Document")
-                for message in st.session_state.messages:
+                hidden = max(0, len(st.session_state.messages) - CHAT_DISPLAY_MESSAGES)
+                if hidden: st.caption(f"{hidden} earlier messages are hidden.")
+                for ref in st.session_state.messages[hidden:]:
+                    message = load_artifact(ref, {"role": "assistant", "content": "_This message has expired._"})
                     with st.chat_message(message["role"]): st.markdown(message["content"])
-                if prompt := st.chat_input("Ask about your contract..."):
-                    st.session_state.messages.append({"role": "user", "content": prompt})
+                if (prompt := st.chat_input("Ask about your contract...")) and (contract_text := load_contract_text()) is not None:
+                    st.session_state.messages.append(put_artifact({"role": "user", "content": prompt}))
                     with st.chat_message("user"): st.markdown(prompt)
+                    contract_ref = st.session_state.contract_ref
+                    chat_history = [message for message in (load_artifact(ref) for ref in st.session_state.messages[-CHAT_HISTORY_MESSAGES - 1:]) if message]
                     with st.chat_message("assistant"):
-                        with st.spinner("Thinking..."):
-                            response = get_chat_response(query=prompt, chat_history=st.session_state.messages, contract_text=st.session_state.contract_text, language=st.session_state.language)
-                            st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                        response = st.write_stream(stream_chat_response(query=prompt, chat_history=chat_history, contract_text=contract_text, language=st.session_state.language, clause_index=derived_artifact(contract_ref, "clause_index", build_clause_index)))
+                    st.session_state.messages.append(put_artifact({"role": "assistant", "content": response}))
 initialize_session_state()
 if not st.session_state.authenticated:
     login_page()
@@ -0,0 +1,138 @@
+# jobs.py
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from analysis_cache import make_key
+from backend import ANALYSIS_OFFLINE, analysis_key, stream_ai_analysis
+import metrics
+
+load_dotenv()
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", ".analysis_jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _is_final(result):
+    # Errors and degraded results (the offline fallback sets "notice") are retried on the next submit instead of being reused.
+    return isinstance(result, dict) and "error" not in result and "notice" not in result
+
+
+class JobQueue:
+    def __init__(self, path=JOBS_DB_PATH, workers=JOB_WORKERS, handlers=None):
+        self.handlers = dict(handlers or {})
+        self._lock = threading.Lock()
+        self._partials = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, started REAL, finished REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        self._conn.commit()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job-worker")
+        metrics.register_collector(lambda: [("jobs", {"status": status}, count) for status, count in self.stats().items()])
+        self._recover()
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _recover(self):
+        with self._lock:
+            job_ids = [row[0] for row in self._conn.execute(f"SELECT id FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))}) ORDER BY created", ACTIVE_STATUSES)]
+            self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            self._conn.commit()
+        for job_id in job_ids:
+            self._pool.submit(self._run, job_id)
+
+    def submit(self, kind, payload, dedupe_key=None) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'.")
+        job_id = dedupe_key or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (now - JOB_RETENTION_SECONDS,))
+            row = self._conn.execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row and (row[0] in ACTIVE_STATUSES or (row[0] == "done" and _is_final(json.loads(row[1])))):
+                self._conn.commit()
+                return job_id
+            self._conn.execute("INSERT OR REPLACE INTO jobs (id, kind, payload, status, created) VALUES (?, ?, ?, 'queued', ?)", (job_id, kind, json.dumps(payload, ensure_ascii=False), now))
+            self._conn.commit()
+        self._pool.submit(self._run, job_id)
+        return job_id
+
+    def _run(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT kind, payload, status, created FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[2] != "queued":
+                return
+            started = time.time()
+            self._conn.execute("UPDATE jobs SET status = 'running', started = ?, attempts = attempts + 1 WHERE id = ?", (started, job_id))
+            self._conn.commit()
+        kind, payload = row[0], json.loads(row[1])
+        metrics.observe("job_wait", started - row[3], kind=kind)
+        try:
+            result = self.handlers[kind](payload)
+            if inspect.isgenerator(result):
+                generator, result = result, None
+                for result in generator:
+                    self._partials[job_id] = result
+            self._execute("UPDATE jobs SET status = 'done', result = ?, finished = ? WHERE id = ?", (json.dumps(result, ensure_ascii=False), time.time(), job_id))
+        except Exception as e:
+            self._execute("UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ?", (f"{type(e).__name__}: {e}", time.time(), job_id))
+        finally:
+            self._partials.pop(job_id, None)
+
+    def get(self, job_id) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT kind, status, result, error, attempts, created, started, finished FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        kind, status, result, error, attempts, created, started, finished = row
+        return {
+            "id": job_id, "kind": kind, "status": status, "result": json.loads(result) if result else None, "partial": self._partials.get(job_id),
+            "error": error, "attempts": attempts, "queued_seconds": round((started or time.time()) - created, 3),
+            "elapsed_seconds": round((finished or time.time()) - started, 3) if started else 0.0,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def _run_analysis(payload):
+    return stream_ai_analysis(payload["text"], language=payload.get("language", "en"))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(handlers={"analysis": _run_analysis})
+        return _queue
+
+
+def submit_analysis(contract_text: str, language: str = 'en') -> str:
+    # Same version components as the analysis cache, so a model, prompt or rules bump does not reuse a finished job from before it.
+    dedupe_key = make_key("analysis", analysis_key(contract_text, language), ANALYSIS_OFFLINE)
+    return get_job_queue().submit("analysis", {"text": contract_text, "language": language}, dedupe_key=dedupe_key)
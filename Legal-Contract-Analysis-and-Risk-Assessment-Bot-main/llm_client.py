@@ -0,0 +1,353 @@
+# llm_client.py
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+MODEL_NAME = 'gemini-1.5-flash'
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_COST_PER_1K_INPUT = float(os.getenv("LLM_COST_PER_1K_INPUT", "0.000075"))
+LLM_COST_PER_1K_OUTPUT = float(os.getenv("LLM_COST_PER_1K_OUTPUT", "0.0003"))
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+MODEL_CACHE_SIZE = 32
+
+
+class LLMConfigError(Exception):
+    pass
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code, message="Simulated API error"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def _is_retryable(error):
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    if isinstance(code, int) and code in RETRYABLE_CODES:
+        return True
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in {"ResourceExhausted", "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "TooManyRequests"}
+
+
+class TokenBucket:
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self._reserve()
+        if wait > 0: time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        wait = self._reserve()
+        if wait > 0: await asyncio.sleep(wait)
+        return wait
+
+
+def _estimate_tokens(text):
+    return len(text) // 4 + 1 if text else 0
+
+
+def _record_usage(model_name, contents, system_instruction, output_text, usage=None):
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is None: prompt_tokens = _estimate_tokens(_contents_text(contents)) + _estimate_tokens(system_instruction or "")
+    if output_tokens is None: output_tokens = _estimate_tokens(output_text)
+    metrics.record_llm_usage(model_name, prompt_tokens, output_tokens, LLM_COST_PER_1K_INPUT, LLM_COST_PER_1K_OUTPUT)
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+class GeminiBackend:
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._configured = False
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _model(self, model_name, system_instruction, generation_config):
+        import google.generativeai as genai
+        key = (model_name, system_instruction, json.dumps(generation_config, sort_keys=True))
+        with self._lock:
+            if not self._configured:
+                api_key = self.api_key or os.getenv("GOOGLE_API_KEY")
+                if not api_key: raise LLMConfigError("Google API key not found.")
+                genai.configure(api_key=api_key)
+                self._configured = True
+            model = self._models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, system_instruction=system_instruction, generation_config=generation_config)
+                self._models[key] = model
+                while len(self._models) > MODEL_CACHE_SIZE: self._models.popitem(last=False)
+            else:
+                self._models.move_to_end(key)
+            return model
+
+    def generate(self, model_name, contents, system_instruction=None, generation_config=None, stream=False, timeout=None):
+        model = self._model(model_name, system_instruction, generation_config)
+        response = model.generate_content(contents, stream=stream, request_options={"timeout": timeout} if timeout else None)
+        if stream:
+            return self._stream(response, model_name, contents, system_instruction)
+        _record_usage(model_name, contents, system_instruction, response.text, getattr(response, "usage_metadata", None))
+        return response.text
+
+    def _stream(self, response, model_name, contents, system_instruction):
+        texts, usage = [], None
+        for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = _chunk_text(chunk)
+            texts.append(text)
+            yield text
+        _record_usage(model_name, contents, system_instruction, "".join(texts), usage)
+
+    async def agenerate(self, model_name, contents, system_instruction=None, generation_config=None, timeout=None):
+        model = self._model(model_name, system_instruction, generation_config)
+        response = await model.generate_content_async(contents, request_options={"timeout": timeout} if timeout else None)
+        _record_usage(model_name, contents, system_instruction, response.text, getattr(response, "usage_metadata", None))
+        return response.text
+
+
+def _contents_text(contents):
+    if isinstance(contents, str):
+        return contents
+    parts = []
+    for item in contents:
+        if isinstance(item, dict): parts.extend(str(part) for part in item.get("parts", []))
+        else: parts.append(str(item))
+    return "\n".join(parts)
+
+
+class FakeBackend:
+    """Deterministic offline stand-in for Gemini with configurable latency and failures."""
+
+    def __init__(self, latency=0.0, chunk_size=24, chunk_delay=0.0, fail_every=0, responder=None):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.fail_every = fail_every
+        self.responder = responder or self.default_response
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_response(contents, system_instruction=None, generation_config=None):
+        text = _contents_text(contents)
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        if (generation_config or {}).get("response_mime_type") != "application/json":
+            return f"Based on the contract excerpts, here is a simulated answer ({digest.hex()[:8]})."
+        levels = ["High", "Medium", "Low", "Low"]
+        clause_ids = [int(clause_id) for clause_id in re.findall(r"\[Clause (\d+)\]", text)]
+        return json.dumps({
+            "summary_analysis": {
+                "contract_type": "Service Agreement", "involved_parties": ["Party A", "Party B"], "important_dates": [],
+                "sections_summary": [{"section_name": f"Clause {clause_id}", "simple_explanation": "Simulated explanation."} for clause_id in clause_ids[:10]],
+                "overall_risk_score": digest[0] % 100 + 1, "executive_summary": "Simulated analysis.", "key_risk_areas": ["Simulated risk"],
+            },
+            "clause_analysis": [
+                {"clause_id": clause_id, "risk_level": levels[(digest[i % len(digest)] + clause_id) % len(levels)], "explanation": "Simulated explanation.", "identified_issue": "Simulated issue", "mitigation_suggestion": "Simulated mitigation."}
+                for i, clause_id in enumerate(clause_ids)
+            ],
+        })
+
+    def _respond(self, model_name, contents, system_instruction, generation_config):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if self.fail_every and call % self.fail_every == 0:
+            raise FakeAPIError(429, "Resource has been exhausted (simulated)")
+        text = self.responder(contents, system_instruction, generation_config)
+        _record_usage(model_name, contents, system_instruction, text)
+        return text
+
+    def _stream(self, text):
+        for i in range(0, len(text), self.chunk_size):
+            if self.chunk_delay: time.sleep(self.chunk_delay)
+            yield text[i:i + self.chunk_size]
+
+    def generate(self, model_name, contents, system_instruction=None, generation_config=None, stream=False, timeout=None):
+        if self.latency: time.sleep(self.latency)
+        text = self._respond(model_name, contents, system_instruction, generation_config)
+        return self._stream(text) if stream else text
+
+    async def agenerate(self, model_name, contents, system_instruction=None, generation_config=None, timeout=None):
+        if self.latency: await asyncio.sleep(self.latency)
+        return self._respond(model_name, contents, system_instruction, generation_config)
+
+
+class _SlotStream:
+    """Iterate a streamed response while holding a concurrency slot; the slot is released when the stream ends, is closed or is collected."""
+
+    def __init__(self, chunks, release):
+        self._chunks = chunks
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is None:
+            return
+        try:
+            close = getattr(self._chunks, "close", None)
+            if close: close()
+        finally:
+            release()
+
+    def __del__(self):
+        self.close()
+
+
+class LLMClient:
+    def __init__(self, backend=None, requests_per_minute=LLM_REQUESTS_PER_MINUTE, burst=LLM_BURST, max_retries=LLM_MAX_RETRIES, timeout=LLM_TIMEOUT_SECONDS, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.backend = backend or (FakeBackend() if LLM_BACKEND == "fake" else GeminiBackend())
+        self.limiter = TokenBucket(requests_per_minute, burst)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._async_slots = weakref.WeakKeyDictionary()
+        self.max_concurrency = max(1, max_concurrency)
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "throttle_seconds": 0.0}
+
+    def set_rate_limit(self, requests_per_minute: float, burst: int = None):
+        self.limiter = TokenBucket(requests_per_minute, burst or self.limiter.capacity)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+    def generate(self, contents, system_instruction=None, generation_config=None, model_name=MODEL_NAME, stream=False):
+        """Return the response text, or an iterator of text chunks when stream is True."""
+        for attempt in range(self.max_retries + 1):
+            self._count("throttle_seconds", self.limiter.acquire())
+            self._count("calls")
+            try:
+                return self._call(contents, system_instruction, generation_config, model_name, stream)
+            except LLMConfigError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+
+    def _call(self, contents, system_instruction, generation_config, model_name, stream):
+        self._slots.acquire()
+        if not stream:
+            try:
+                with metrics.span("llm_call", model=model_name):
+                    return self.backend.generate(model_name, contents, system_instruction, generation_config, stream=False, timeout=self.timeout)
+            finally:
+                self._slots.release()
+        try:
+            chunks = self.backend.generate(model_name, contents, system_instruction, generation_config, stream=True, timeout=self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+        return _SlotStream(iter(metrics.timed_iter(chunks, "llm_call", first_stage="llm_first_chunk", model=model_name)), self._slots.release)
+
+    def _async_semaphore(self):
+        # asyncio primitives are bound to the loop that first waits on them, so each event loop gets its own semaphore.
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+            return slots
+
+    async def agenerate(self, contents, system_instruction=None, generation_config=None, model_name=MODEL_NAME):
+        slots = self._async_semaphore()
+        for attempt in range(self.max_retries + 1):
+            self._count("throttle_seconds", await self.limiter.acquire_async())
+            self._count("calls")
+            try:
+                async with slots, metrics.async_span("llm_call", model=model_name):
+                    return await asyncio.wait_for(self.backend.agenerate(model_name, contents, system_instruction, generation_config, timeout=self.timeout), self.timeout or None)
+            except LLMConfigError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not (_is_retryable(e) or isinstance(e, asyncio.TimeoutError)):
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                await asyncio.sleep(self._backoff(attempt))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "throttle_seconds": round(self.counters["throttle_seconds"], 3)}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _collect_client_metrics():
+    if _client is None: return []
+    stats = _client.stats()
+    return [("llm_calls_total", {}, stats["calls"]), ("llm_retries_total", {}, stats["retries"]), ("llm_failures_total", {}, stats["failures"]), ("llm_throttle_seconds_total", {}, stats["throttle_seconds"])]
+
+
+metrics.register_collector(_collect_client_metrics)
+
+
+def get_client() -> LLMClient:
+    global _client
+    with _client_lock:
+        if _client is None: _client = LLMClient()
+        return _client
+
+
+def set_backend(backend, **client_options) -> LLMClient:
+    global _client
+    with _client_lock:
+        _client = LLMClient(backend=backend, **client_options)
+        return _client
@@ -0,0 +1,218 @@
+# metrics.py
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PREFIX = "riskbot"
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_LOG = os.getenv("METRICS_LOG", "0") == "1"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RECENT_SAMPLES = 200
+
+logger = logging.getLogger("riskbot.metrics")
+if METRICS_LOG and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_collectors = []
+_exporters_started = False
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(stage: str, seconds: float, **labels):
+    labels = {"stage": stage, **{k: str(v) for k, v in labels.items()}}
+    key = _key("stage_duration_seconds", labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "recent": deque(maxlen=RECENT_SAMPLES)}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound: histogram["buckets"][i] += 1
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        histogram["recent"].append(seconds)
+    logger.info(json.dumps({"event": "span", "ts": round(time.time(), 3), **labels, "seconds": round(seconds, 6)}, ensure_ascii=False))
+
+
+def inc(name: str, value: float = 1, **labels):
+    key = _key(name, {k: str(v) for k, v in labels.items()})
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def span(stage: str, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started, **labels)
+
+
+@asynccontextmanager
+async def async_span(stage: str, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started, **labels)
+
+
+def timed_iter(iterable, stage: str, first_stage: str = None, **labels):
+    started = time.perf_counter()
+    first = True
+    try:
+        for item in iterable:
+            if first and first_stage:
+                observe(first_stage, time.perf_counter() - started, **labels)
+            first = False
+            yield item
+    finally:
+        observe(stage, time.perf_counter() - started, **labels)
+
+
+def register_collector(collector):
+    """Register a callable returning (name, labels, value) tuples that is sampled at export time."""
+    with _lock:
+        _collectors.append(collector)
+
+
+def record_llm_usage(model: str, prompt_tokens: int, output_tokens: int, input_cost_per_1k: float, output_cost_per_1k: float):
+    inc("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    inc("llm_tokens_total", output_tokens, model=model, kind="output")
+    cost = prompt_tokens / 1000 * input_cost_per_1k + output_tokens / 1000 * output_cost_per_1k
+    inc("llm_cost_usd_total", cost, model=model)
+    logger.info(json.dumps({"event": "llm_usage", "ts": round(time.time(), 3), "model": model, "prompt_tokens": prompt_tokens, "output_tokens": output_tokens, "cost_usd": round(cost, 6)}))
+
+
+def _percentile(values, fraction):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _collected():
+    samples = []
+    with _lock:
+        collectors = list(_collectors)
+    for collector in collectors:
+        try:
+            samples.extend(collector())
+        except Exception as e:
+            logger.warning(f"Metrics collector failed: {e}")
+    return samples
+
+
+def snapshot() -> dict:
+    with _lock:
+        stages = {
+            dict(labels)["stage"] + "".join(f" {k}={v}" for k, v in labels if k != "stage"): {
+                "count": h["count"], "total_seconds": round(h["sum"], 3), "avg_ms": round(h["sum"] / h["count"] * 1000, 1) if h["count"] else 0.0,
+                "p50_ms": round(_percentile(h["recent"], 0.5) * 1000, 1), "p95_ms": round(_percentile(h["recent"], 0.95) * 1000, 1),
+            }
+            for (_, labels), h in _histograms.items()
+        }
+        counters = {name + "".join(f" {k}={v}" for k, v in labels): round(value, 6) for (name, labels), value in _counters.items()}
+    for name, labels, value in _collected():
+        counters[name + "".join(f" {k}={v}" for k, v in sorted(labels.items()))] = value
+    return {"stages": stages, "counters": counters}
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items: return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _format_value(value):
+    # "g" keeps only six significant digits, which would round token and cost counters.
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _lock:
+        histograms = [(labels, {"buckets": list(h["buckets"]), "count": h["count"], "sum": h["sum"]}) for (_, labels), h in sorted(_histograms.items())]
+        counters = sorted(_counters.items())
+    metric = f"{METRICS_PREFIX}_stage_duration_seconds"
+    if histograms: lines.append(f"# TYPE {metric} histogram")
+    for labels, h in histograms:
+        for bound, count in zip(BUCKETS, h["buckets"]):
+            lines.append(f"{metric}_bucket{_format_labels(labels, {'le': bound})} {count}")
+        lines.append(f"{metric}_bucket{_format_labels(labels, {'le': '+Inf'})} {h['count']}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {h['sum']:.6f}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {h['count']}")
+    typed = set()
+    for (name, labels), value in counters:
+        full = f"{METRICS_PREFIX}_{name}"
+        if full not in typed:
+            lines.append(f"# TYPE {full} counter"); typed.add(full)
+        lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+    for name, labels, value in sorted(_collected(), key=lambda sample: sample[0]):
+        full = f"{METRICS_PREFIX}_{name}"
+        if full not in typed:
+            lines.append(f"# TYPE {full} {'counter' if name.endswith('_total') else 'gauge'}"); typed.add(full)
+        lines.append(f"{full}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporters(port: int = METRICS_PORT, path: str = METRICS_FILE, interval: float = METRICS_FILE_INTERVAL):
+    """Start the /metrics HTTP endpoint and/or the periodic metrics file writer once per process."""
+    global _exporters_started
+    with _lock:
+        if _exporters_started: return
+        _exporters_started = True
+    if port:
+        try:
+            server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint on port {port}: {e}")
+    if path:
+        def _write_forever():
+            while True:
+                time.sleep(interval)
+                try: write_prometheus_file(path)
+                except OSError as e: logger.warning(f"Could not write metrics file {path}: {e}")
+        threading.Thread(target=_write_forever, name="metrics-file", daemon=True).start()
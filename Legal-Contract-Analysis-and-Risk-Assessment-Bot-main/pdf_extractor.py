@@ -0,0 +1,116 @@
+# pdf_extractor.py
+
+import os
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pypdfium2 as pdfium
+from dotenv import load_dotenv
+from analysis_cache import AnalysisCache, make_key
+
+load_dotenv()
+
+EXTRACTOR_VERSION = "1"
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "1"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+PDF_PAGE_CACHE_MAX_ITEMS = int(os.getenv("PDF_PAGE_CACHE_MAX_ITEMS", "200000"))
+
+_page_cache = AnalysisCache(memory_items=256, max_items=PDF_PAGE_CACHE_MAX_ITEMS, table="pdf_pages")
+
+
+def _page_text(doc, index):
+    page = doc[index]
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
+
+
+def iter_pdf_pages(file_bytes, start=0, stop=None):
+    doc = pdfium.PdfDocument(file_bytes)
+    try:
+        stop = len(doc) if stop is None else min(stop, len(doc))
+        for index in range(start, stop):
+            yield _page_text(doc, index)
+    finally:
+        doc.close()
+
+
+def _extract_range(file_bytes, start, stop):
+    return list(iter_pdf_pages(file_bytes, start, stop))
+
+
+def _page_ranges(indices, workers):
+    runs, run = [], []
+    for index in indices:
+        if run and index != run[-1] + 1:
+            runs.append(run); run = []
+        run.append(index)
+    if run: runs.append(run)
+    size = max(1, -(-len(indices) // (workers * 4)))
+    return [(run[i], run[min(i + size, len(run)) - 1] + 1) for run in runs for i in range(0, len(run), size)]
+
+
+def _page_count(file_bytes):
+    doc = pdfium.PdfDocument(file_bytes)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+def extract_pdf_pages(file_bytes, workers=None, use_cache=True, stats=None):
+    """Yield page texts in order, reading cached pages first and extracting the rest."""
+    started = time.perf_counter()
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    page_count = _page_count(file_bytes)
+    keys = [make_key(file_hash, index, EXTRACTOR_VERSION) for index in range(page_count)]
+    cached = {}
+    if use_cache:
+        found = _page_cache.get_many(keys)
+        cached = {index: found[key] for index, key in enumerate(keys) if key in found}
+    missing = [index for index in range(page_count) if index not in cached]
+    if stats is not None:
+        stats.update(pages=page_count, cached_pages=len(cached), workers=1)
+
+    def _emit(index, text):
+        if stats is not None:
+            elapsed = time.perf_counter() - started
+            stats.update(pages_done=index + 1, seconds=round(elapsed, 3), pages_per_sec=round((index + 1) / elapsed, 1) if elapsed else 0.0)
+        return text
+
+    if workers > 1 and len(missing) >= PDF_PARALLEL_MIN_PAGES:
+        if stats is not None: stats["workers"] = workers
+        # Forking the threaded Streamlit server or job workers could copy held locks and pdfium state into the child.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {start: pool.submit(_extract_range, file_bytes, start, stop) for start, stop in _page_ranges(missing, workers)}
+            index = 0
+            while index < page_count:
+                if index in cached:
+                    yield _emit(index, cached[index]); index += 1
+                    continue
+                texts = futures.pop(index).result()
+                if use_cache: _page_cache.set_many(zip(keys[index:index + len(texts)], texts))
+                for text in texts:
+                    yield _emit(index, text); index += 1
+        return
+
+    doc = pdfium.PdfDocument(file_bytes) if missing else None
+    fresh = []
+    try:
+        for index in range(page_count):
+            if index in cached:
+                yield _emit(index, cached[index])
+                continue
+            text = _page_text(doc, index)
+            if use_cache: fresh.append((keys[index], text))
+            if len(fresh) >= 64:
+                _page_cache.set_many(fresh); fresh = []
+            yield _emit(index, text)
+    finally:
+        if doc is not None: doc.close()
+        if fresh: _page_cache.set_many(fresh)
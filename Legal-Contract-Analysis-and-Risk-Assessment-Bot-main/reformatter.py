@@ -2,27 +2,112 @@
 
 import re
 
-def _find_section(text: str, keywords: list, next_keywords: list) -> str:
-    start_pattern = r"(?i)\b(" + "|".join(keywords) + r")\b"
-    end_pattern = r"(?i)\b(" + "|".join(next_keywords) + r")\b"
-    start_match = re.search(start_pattern, text)
-    if not start_match:
-        return ""
-    end_match = re.search(end_pattern, text[start_match.end():])
-    if end_match:
-        return text[start_match.start() : start_match.end() + end_match.start()].strip()
-    else:
-        return text[start_match.start():].strip()
+SECTION_KEYWORDS = {
+    "parties": ["parties", "between"],
+    "term": ["term", "effective date"],
+    "confidentiality": ["confidentiality", "confidential information", "non-disclosure"],
+    "governing_law": ["governing law", "jurisdiction"],
+    "dispute_resolution": ["dispute resolution", "arbitration"],
+    "services": ["scope of services", "scope of work", "services"],
+    "payment": ["payment", "fees", "consideration", "invoice"],
+    "termination": ["termination"],
+    "duties": ["position", "duties", "responsibilities", "designation"],
+    "compensation": ["compensation", "salary", "remuneration", "ctc"],
+    "probation": ["probation"],
+    "non_compete": ["non-compete", "non-solicitation", "restrictive covenant"],
+    "rent": ["rent", "lease rent", "license fee"],
+    "security_deposit": ["security deposit"],
+    "maintenance": ["maintenance", "repairs"],
+    "capital": ["capital contribution", "capital"],
+    "profit_sharing": ["profit sharing", "profits and losses", "profit"],
+    "management": ["management", "decision making", "authority"],
+    "delivery": ["delivery", "shipment"],
+    "warranties": ["warranties", "warranty"],
+    "interest": ["interest", "rate of interest"],
+    "repayment": ["repayment", "instalments", "installments"],
+    "default": ["event of default", "default"],
+    "intellectual_property": ["intellectual property", "ownership of work", "deliverables"],
+}
+SECTION_TITLES = {
+    "term": "TERM", "confidentiality": "CONFIDENTIALITY", "services": "SCOPE OF SERVICES", "payment": "FEES AND PAYMENT", "termination": "TERMINATION",
+    "duties": "POSITION AND DUTIES", "compensation": "COMPENSATION", "probation": "PROBATION", "non_compete": "NON-COMPETE AND NON-SOLICITATION",
+    "rent": "RENT", "security_deposit": "SECURITY DEPOSIT", "maintenance": "MAINTENANCE AND REPAIRS", "capital": "CAPITAL CONTRIBUTION",
+    "profit_sharing": "PROFIT SHARING", "management": "MANAGEMENT", "delivery": "DELIVERY", "warranties": "WARRANTIES", "interest": "INTEREST",
+    "repayment": "REPAYMENT", "default": "EVENTS OF DEFAULT", "intellectual_property": "INTELLECTUAL PROPERTY",
+}
+TEMPLATE_TYPES = {
+    "Non-Disclosure Agreement (NDA)": ["confidentiality", "term", "termination"],
+    "Service Agreement": ["services", "payment", "term", "termination", "confidentiality"],
+    "Employment Agreement": ["duties", "compensation", "probation", "termination", "confidentiality", "non_compete"],
+    "Consultancy Agreement": ["services", "payment", "intellectual_property", "term", "termination", "confidentiality"],
+    "Lease / Rental Agreement": ["term", "rent", "security_deposit", "maintenance", "termination"],
+    "Partnership Agreement": ["capital", "profit_sharing", "management", "term", "termination"],
+    "Vendor / Supply Agreement": ["delivery", "payment", "warranties", "term", "termination"],
+    "Loan Agreement": ["interest", "repayment", "default", "term"],
+}
+PARTIES_STOPS = ["term", "confidentiality", "governing_law", "dispute_resolution"]
+
+_CLAUSE_PATTERN = re.compile(r"\n\s*\d+\.(?=\s)")
+
+
+class SectionIndex:
+    """Finds slot sections with plain substring searches on a lowercased copy, resolved lazily per slot."""
+
+    def __init__(self, text: str):
+        self.text = text
+        lowered = text.lower()
+        # lower() changes the length of a few non-ASCII characters; fall back to regex search there so offsets stay valid.
+        self._lowered = lowered if len(lowered) == len(text) else None
+        self._first = {}
+
+    def _is_word(self, i):
+        return 0 <= i < len(self.text) and (self.text[i].isalnum() or self.text[i] == "_")
+
+    def _search(self, keyword, position):
+        if self._lowered is None:
+            match = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE).search(self.text, position)
+            return match.start() if match else -1
+        i = self._lowered.find(keyword, position)
+        while i != -1 and (self._is_word(i - 1) or self._is_word(i + len(keyword))):
+            i = self._lowered.find(keyword, i + 1)
+        return i
+
+    def _next(self, slot, position):
+        hits = [i for i in (self._search(keyword, position) for keyword in SECTION_KEYWORDS[slot]) if i != -1]
+        return min(hits, default=-1)
+
+    def start(self, slot):
+        if slot not in self._first:
+            self._first[slot] = self._next(slot, 0)
+        return self._first[slot]
+
+    def first_clause_start(self):
+        match = _CLAUSE_PATTERN.search(self.text)
+        return match.start() if match else None
+
+    def find(self, slot: str, stop_slots: list = ()) -> str:
+        start = self.start(slot)
+        if start == -1:
+            return ""
+        clause = _CLAUSE_PATTERN.search(self.text, start + 1)
+        ends = [i for i in (self._next(stop, start + 1) for stop in stop_slots) if i != -1]
+        end = min(ends + [clause.start() if clause else len(self.text)])
+        return self.text[start:end].strip()
+
 
 def reformat_contract_as_template(text: str, template_type: str, language: str = 'en'):
-    body_clauses = re.findall(r"(\n\s*\d+\..+)", text, re.DOTALL)
-    body_text = "".join(body_clauses).strip() if body_clauses else "[COULD NOT AUTOMATICALLY EXTRACT NUMBERED CLAUSES]"
-    all_headings = ["term", "effective date", "confidentiality", "governing law", "jurisdiction", "dispute resolution", "arbitration"]
+    index = SectionIndex(text)
+    body_start = index.first_clause_start()
+    body_text = text[body_start:].strip() if body_start is not None else "[COULD NOT AUTOMATICALLY EXTRACT NUMBERED CLAUSES]"
+    key_terms = "\n".join(
+        f"**{SECTION_TITLES[slot]}**\n{index.find(slot) or f'[{SECTION_TITLES[slot]} NOT FOUND - PLEASE INSERT MANUALLY]'}"
+        for slot in TEMPLATE_TYPES.get(template_type, [])
+    )
     reformatted_text = f"""
 ## {template_type.upper()}
 **This Agreement** is made and entered into on this ______ day of __________, 20__
 **BY AND BETWEEN:**
-{_find_section(text, ["parties", "between"], all_headings) or "[PARTIES SECTION NOT FOUND - PLEASE INSERT MANUALLY]"}
+{index.find("parties", PARTIES_STOPS) or "[PARTIES SECTION NOT FOUND - PLEASE INSERT MANUALLY]"}
 **WHEREAS:**
 (A) [Insert Recital A]
 (B) [Insert Recital B]
@@ -32,12 +117,16 @@ def reformat_contract_as_template(text: str, template_type: str, language: str =
 ---
 {body_text}
 ---
+### KEY TERMS
+---
+{key_terms or "[NO KEY TERMS DEFINED FOR THIS TEMPLATE TYPE]"}
+---
 ### STANDARD CLAUSES
 ---
 **GOVERNING LAW AND JURISDICTION**
-{_find_section(text, ["governing law", "jurisdiction"], ["dispute resolution", "arbitration"]) or "This Agreement shall be governed by and construed in accordance with the laws of India. The Parties agree to submit to the exclusive jurisdiction of the courts in [Specify City, e.g., Mumbai]."}
+{index.find("governing_law", ["dispute_resolution"]) or "This Agreement shall be governed by and construed in accordance with the laws of India. The Parties agree to submit to the exclusive jurisdiction of the courts in [Specify City, e.g., Mumbai]."}
 **DISPUTE RESOLUTION**
-{_find_section(text, ["dispute resolution", "arbitration"], []) or "Any dispute arising out of or in connection with this Agreement shall be referred to and finally resolved by arbitration in accordance with the Arbitration and Conciliation Act, 1996. The seat of the arbitration shall be [Specify City, e.g., New Delhi]."}
+{index.find("dispute_resolution") or "Any dispute arising out of or in connection with this Agreement shall be referred to and finally resolved by arbitration in accordance with the Arbitration and Conciliation Act, 1996. The seat of the arbitration shall be [Specify City, e.g., New Delhi]."}
 **IN WITNESS WHEREOF,** the Parties have executed this Agreement as of the date first above written.
 **For [PARTY 1 NAME]:**
 _________________________
@@ -48,4 +137,4 @@ _________________________
 Name:
 Title:
 """
-    return reformatted_text.strip()
\ No newline at end of file
+    return reformatted_text.strip()
@@ -0,0 +1,169 @@
+# risk_rules.py
+
+import re
+from collections import Counter
+
+RULES_VERSION = "3"
+_FLAGS = re.IGNORECASE
+
+
+def _compile(*patterns):
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), _FLAGS)
+
+
+RISK_RULES = [
+    {
+        "name": "Unlimited liability",
+        "risk_level": "High",
+        "pattern": _compile(
+            r"unlimited liability", r"liability\s+(?:shall\s+)?(?:be\s+)?unlimited", r"without\s+(?:any\s+)?limit(?:ation)?\s+(?:of|on|to)\s+(?:its\s+|the\s+)?liability",
+            r"no\s+(?:cap|limit)\s+on\s+(?:its\s+|the\s+)?liability", r"liable\s+for\s+any\s+and\s+all\s+(?:losses|damages|claims)", r"असीमित\s+दायित्व",
+        ),
+        "explanation": "The clause exposes you to liability with no upper limit, so a single claim could exceed the value of the whole contract.",
+        "mitigation": "Cap total liability (for example, at the fees paid in the last 12 months) and exclude indirect and consequential losses.",
+    },
+    {
+        "name": "Unilateral termination",
+        "risk_level": "High",
+        "pattern": _compile(
+            r"(?:may|can|shall\s+have\s+the\s+right\s+to|reserves\s+the\s+right\s+to)\s+terminate\s+(?:this\s+agreement\s+)?(?:at\s+any\s+time|immediately|forthwith|without\s+(?:any\s+)?(?:prior\s+)?(?:notice|cause|reason))",
+            r"sole\s+(?:and\s+absolute\s+)?discretion\s+to\s+terminate", r"बिना\s+(?:किसी\s+)?(?:पूर्व\s+)?सूचना\s+के?\s*.{0,40}समाप्त",
+        ),
+        "explanation": "One party can end the contract at will or without notice, leaving you without time to replace the business or recover costs.",
+        "mitigation": "Make termination rights mutual and require a written notice period (for example, 30 days) and payment for work already done.",
+    },
+    {
+        "name": "Unilateral amendment",
+        "risk_level": "High",
+        "pattern": _compile(r"(?:may|can|reserves\s+the\s+right\s+to)\s+(?:modify|amend|change|revise)\s+(?:the\s+terms\s+of\s+)?(?:this\s+agreement|these\s+terms|the\s+terms)(?:\s+\w+){0,4}\s+(?:at\s+any\s+time|without\s+(?:prior\s+)?notice|in\s+its\s+sole\s+discretion)"),
+        "explanation": "The other party can change the terms on its own, so the contract you sign may not be the contract you end up bound by.",
+        "mitigation": "Require that any amendment is in writing and signed by both parties.",
+    },
+    {
+        "name": "Non-compete",
+        "risk_level": "High",
+        "pattern": _compile(r"non-?compet(?:e|ition)", r"shall\s+not,?\s+(?:directly\s+or\s+indirectly,?\s+)?(?:engage\s+in|carry\s+on)\s+(?:any\s+)?(?:business|activity)\s+(?:that\s+|which\s+)?compet", r"restrictive\s+covenant", r"प्रतिस्पर्धा\s+नहीं"),
+        "explanation": "The clause restricts your ability to do similar business; post-termination restraints of trade are generally void under Section 27 of the Indian Contract Act, 1872, but can still be used to threaten litigation.",
+        "mitigation": "Limit the restriction to the term of the contract and to soliciting the other party's named clients or employees.",
+    },
+    {
+        "name": "Broad indemnity",
+        "risk_level": "Medium",
+        "pattern": _compile(r"indemnif(?:y|ies|ied|ication)", r"hold\s+harmless", r"keep\s+(?:the\s+\w+\s+)?indemnified", r"क्षतिपूर्ति"),
+        "explanation": "You may have to pay the other party's losses, legal costs or third-party claims.",
+        "mitigation": "Make the indemnity mutual, limit it to losses caused by your breach or negligence, and bring it under the liability cap.",
+    },
+    {
+        "name": "Automatic renewal",
+        "risk_level": "Medium",
+        "pattern": _compile(r"automatic(?:ally)?\s+renew", r"auto-?renew", r"renew(?:ed|s)?\s+automatically", r"deemed\s+(?:to\s+(?:have\s+been|be)\s+)?renewed", r"स्वतः\s+नवीनीकृत"),
+        "explanation": "The contract renews on its own unless someone cancels in time, which can lock you in for another full term.",
+        "mitigation": "Add a renewal reminder obligation or require express written consent to renew, and keep the cancellation window short.",
+    },
+    {
+        "name": "Penalty or liquidated damages",
+        "risk_level": "Medium",
+        "pattern": _compile(r"liquidated\s+damages", r"\bpenalt(?:y|ies)\b", r"forfeit(?:ure)?\b", r"late\s+(?:payment\s+)?(?:fee|charge|interest)"),
+        "explanation": "Fixed payments or forfeitures apply on breach or delay, regardless of the actual loss suffered.",
+        "mitigation": "Make sure the amount is a genuine pre-estimate of loss (Section 74, Indian Contract Act) and cap it.",
+    },
+]
+
+SAFE_BOILERPLATE = _compile(
+    r"executed\s+in\s+(?:any\s+number\s+of\s+|one\s+or\s+more\s+|two\s+)?counterparts", r"headings?\s+(?:are|is)\s+(?:inserted\s+)?for\s+(?:convenience|reference)",
+    r"\bseverab(?:le|ility)\b", r"entire\s+agreement", r"in\s+witness\s+whereof", r"notices?\s+(?:under\s+this\s+agreement\s+)?shall\s+be\s+(?:given\s+)?in\s+writing",
+    r"words\s+(?:importing|denoting)\s+the\s+singular", r"no\s+waiver\s+of\s+any\s+(?:breach|provision)", r"shall\s+be\s+binding\s+(?:up)?on\s+(?:the\s+parties\s+and\s+)?their\s+(?:respective\s+)?(?:successors|heirs)",
+)
+# English negators precede the phrase they negate ("shall not be liable", "nothing ... shall be construed as"); Hindi ones follow the verb.
+NEGATION_BEFORE = _compile(r"\b(?:not|no|neither|nor|nothing|never)\b")
+NEGATION_AFTER = re.compile(r"नहीं|(?<!\S)न(?!\S)")
+NEGATION_WINDOW = 80
+MITIGATING = _compile(r"either\s+party", r"both\s+parties", r"mutual(?:ly)?", r"shall\s+not\s+exceed", r"(?:capped|limited)\s+(?:at|to)", r"aggregate\s+liability", r"\d+\s+days'?\s+(?:prior\s+)?(?:written\s+)?notice")
+
+CONTRACT_TYPES = [
+    ("Non-Disclosure Agreement", _compile(r"non-?disclosure", r"confidential\s+information")),
+    ("Employment Agreement", _compile(r"\bemploy(?:er|ee|ment)\b", r"\bsalary\b", r"probation")),
+    ("Lease Agreement", _compile(r"\blease\b", r"\blessor\b", r"\blessee\b", r"\brent\b")),
+    ("Partnership Agreement", _compile(r"\bpartnership\b", r"\bpartners\b")),
+    ("Vendor / Supply Agreement", _compile(r"\bvendor\b", r"\bsupplier\b", r"purchase\s+order", r"\bgoods\b")),
+    ("Service Agreement", _compile(r"\bservices?\b", r"service\s+provider", r"statement\s+of\s+work")),
+]
+_PARTIES_RE = re.compile(r"\bbetween\s+(.{3,120}?)\s*(?:\(.*?\)\s*)?,?\s+and\s+(.{3,120}?)(?:\s*\(|[,.;\n])", _FLAGS | re.DOTALL)
+_DATE_RE = re.compile(r"\b(?:\d{1,2}(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*,?\s+\d{4}|\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\s+\d{1,2},\s+\d{4})\b", _FLAGS)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.;!?\u0964])\s+|\n+")
+MIN_SENTENCE_CHARS = 40
+_CLAUSE_BREAK_RE = re.compile(r"[.;:!?\u0964]")
+_HEADING_RE = re.compile(r"^\s*\d+\.\s*([^\n.:]{3,60})")
+LEVEL_SCORES = {"High": 85, "Medium": 50, "Low": 10}
+
+
+def _is_all_boilerplate(clause: str) -> bool:
+    # Headings and numbering are short fragments; every substantive sentence must itself be boilerplate.
+    sentences = [sentence for sentence in _SENTENCE_SPLIT_RE.split(clause) if len(sentence.strip()) >= MIN_SENTENCE_CHARS]
+    return bool(sentences) and all(SAFE_BOILERPLATE.search(sentence) for sentence in sentences)
+
+
+def _is_negated(clause: str, match) -> bool:
+    before = _CLAUSE_BREAK_RE.split(clause[max(0, match.start() - NEGATION_WINDOW):match.start()])[-1]
+    after = _CLAUSE_BREAK_RE.split(clause[match.end():match.end() + NEGATION_WINDOW])[0]
+    return bool(NEGATION_BEFORE.search(before) or NEGATION_AFTER.search(after))
+
+
+def screen_clause(clause: str):
+    """Return (finding, decided) for a clause; decided is False when the clause should go to the model."""
+    matched = [rule for rule in RISK_RULES if any(not _is_negated(clause, match) for match in rule["pattern"].finditer(clause))]
+    mitigated = bool(MITIGATING.search(clause))
+    if not matched:
+        if _is_all_boilerplate(clause):
+            return {"risk_level": "Low", "explanation": "Standard boilerplate wording that does not shift risk to either party.", "identified_issue": "No significant issues identified", "mitigation_suggestion": "No change needed.", "source": "rules"}, True
+        return None, False
+    top = "High" if any(rule["risk_level"] == "High" for rule in matched) else "Medium"
+    finding = {
+        "risk_level": top,
+        "explanation": " ".join(rule["explanation"] for rule in matched),
+        "identified_issue": ", ".join(rule["name"] for rule in matched),
+        "mitigation_suggestion": " ".join(rule["mitigation"] for rule in matched),
+        "source": "rules",
+    }
+    return finding, top == "High" and not mitigated
+
+
+def summarize_locally(clauses: list, findings: list) -> dict:
+    text = "\n".join(clauses)
+    type_scores = Counter({name: len(pattern.findall(text)) for name, pattern in CONTRACT_TYPES})
+    contract_type = type_scores.most_common(1)[0][0] if type_scores and type_scores.most_common(1)[0][1] else "General Contract"
+    parties_match = _PARTIES_RE.search(text[:3000])
+    parties = [" ".join(party.split()) for party in parties_match.groups()] if parties_match else []
+    dates = []
+    for clause in clauses:
+        for match in _DATE_RE.finditer(clause):
+            context = " ".join(clause[max(0, match.start() - 60):match.end() + 60].split())
+            dates.append({"date": match.group(0), "context": context})
+    sections = []
+    for clause, finding in zip(clauses, findings):
+        heading = _HEADING_RE.match(clause)
+        if heading and finding:
+            sections.append({"section_name": heading.group(1).strip(), "simple_explanation": finding.get("explanation", "")})
+    levels = [finding.get("risk_level") for finding in findings if finding]
+    score = round(sum(LEVEL_SCORES.get(level, 50) for level in levels) / len(levels)) if levels else 0
+    risk_areas = list(dict.fromkeys(name.strip() for finding in findings if finding and finding.get("risk_level") != "Low" for name in finding.get("identified_issue", "").split(",") if name.strip()))
+    counts = Counter(levels)
+    return {
+        "contract_type": contract_type,
+        "involved_parties": parties,
+        "important_dates": dates[:20],
+        "sections_summary": sections,
+        "overall_risk_score": max(1, min(100, score)) if levels else 0,
+        "executive_summary": f"Rule-based screening of {len(clauses)} clauses found {counts.get('High', 0)} high-risk, {counts.get('Medium', 0)} medium-risk and {counts.get('Low', 0)} low-risk clauses. Clauses that did not match a known pattern need manual review.",
+        "key_risk_areas": risk_areas,
+    }
+
+
+def analyze_offline(clauses: list) -> dict:
+    findings = []
+    for clause in clauses:
+        finding, _ = screen_clause(clause)
+        findings.append(finding or {"risk_level": "Medium", "explanation": "This clause did not match any known pattern and could not be assessed offline.", "identified_issue": "Needs manual review", "mitigation_suggestion": "Review this clause with the AI analysis or a lawyer.", "source": "rules"})
+    for i, finding in enumerate(findings, start=1):
+        finding["clause_id"] = i
+    return {"summary_analysis": summarize_locally(clauses, findings), "clause_analysis": findings}
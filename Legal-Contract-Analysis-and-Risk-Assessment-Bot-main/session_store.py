@@ -0,0 +1,227 @@
+# session_store.py
+
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+import metrics
+from analysis_cache import make_key
+
+load_dotenv()
+
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", ".session_store.sqlite3")
+SESSION_STORE_MEMORY_MB = float(os.getenv("SESSION_STORE_MEMORY_MB", "256"))
+SESSION_STORE_DISK_MB = float(os.getenv("SESSION_STORE_DISK_MB", "2048"))
+SESSION_STORE_TTL_SECONDS = int(os.getenv("SESSION_STORE_TTL_SECONDS", str(7 * 24 * 3600)))
+SESSION_STORE_COMPRESSION = int(os.getenv("SESSION_STORE_COMPRESSION", "6"))
+PRUNE_INTERVAL_SECONDS = 60
+ACCESS_FLUSH_SECONDS = 30
+
+
+def _sizeof(value, seen=None):
+    """Approximate in-memory size of a decoded artifact, following containers and plain objects."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += _sizeof(vars(value), seen)
+    return size
+
+
+class ArtifactStore:
+    """Content-addressed, zlib-compressed artifacts on disk behind a byte-budgeted LRU shared by every session in the process.
+
+    Loaded values are shared between sessions, so callers must treat them as read-only.
+    """
+
+    def __init__(self, path=SESSION_STORE_PATH, memory_budget_mb=SESSION_STORE_MEMORY_MB, disk_budget_mb=SESSION_STORE_DISK_MB, ttl_seconds=SESSION_STORE_TTL_SECONDS, level=SESSION_STORE_COMPRESSION):
+        self.path = path
+        self.memory_budget = int(memory_budget_mb * 2**20)
+        self.disk_budget = int(disk_budget_mb * 2**20)
+        self.ttl_seconds = ttl_seconds
+        self.level = level
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last_prune = 0.0
+        self._touched = {}
+        self._last_flush = 0.0
+        self.counters = {"puts": 0, "dedupes": 0, "hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+        metrics.register_collector(self._collect)
+
+    def _collect(self):
+        stats = self.stats()
+        samples = [(f"session_store_{name}_total", {}, stats[name]) for name in ("puts", "dedupes", "hits", "misses", "memory_evictions", "disk_evictions")]
+        samples += [("session_store_bytes", {"tier": "memory"}, stats["memory_bytes"]), ("session_store_bytes", {"tier": "disk"}, stats["disk_bytes"])]
+        return samples
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS artifacts (key TEXT PRIMARY KEY, data BLOB NOT NULL, raw_size INTEGER NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, value, size=None):
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        size = _sizeof(value) if size is None else size
+        if size > self.memory_budget:
+            return
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+            self.counters["memory_evictions"] += 1
+
+    def put(self, value) -> str:
+        """Store a JSON-serializable value and return its handle; identical values share one copy."""
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        key = make_key("artifact", payload.decode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self.counters["puts"] += 1
+            try:
+                db = self._db()
+                if db.execute("UPDATE artifacts SET accessed = ? WHERE key = ?", (now, key)).rowcount:
+                    self.counters["dedupes"] += 1
+                else:
+                    data = zlib.compress(payload, self.level)
+                    db.execute("INSERT INTO artifacts (key, data, raw_size, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)", (key, data, len(payload), len(data), now, now))
+                self._flush_touched(db, now)
+                self._prune(db, now)
+                db.commit()
+            except sqlite3.Error:
+                pass
+            self._remember(key, value)
+        return key
+
+    def get(self, key, default=None):
+        if not key:
+            return default
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._touch(key)
+                self.counters["hits"] += 1
+                self.counters["memory_hits"] += 1
+                return entry[0]
+            try:
+                db = self._db()
+                row = db.execute("SELECT data FROM artifacts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE artifacts SET accessed = ? WHERE key = ?", (time.time(), key))
+                    db.commit()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return default
+            value = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+            self._remember(key, value)
+            self.counters["hits"] += 1
+            self.counters["disk_hits"] += 1
+            return value
+
+    def derived(self, key, name, builder):
+        """Return builder(artifact) memoized in memory under the same budget; it is rebuilt after eviction, never persisted."""
+        derived_key = f"{key}:{name}"
+        with self._lock:
+            entry = self._memory.get(derived_key)
+            if entry is not None:
+                self._memory.move_to_end(derived_key)
+                self._touch(key)
+                return entry[0]
+        source = self.get(key)
+        if source is None:
+            return None
+        value = builder(source)
+        with self._lock:
+            self._remember(derived_key, value)
+        return value
+
+    def _touch(self, key):
+        """Record a memory hit so the disk copy of an artifact in use is not pruned as if it were idle."""
+        now = time.time()
+        self._touched[key] = now
+        if now - self._last_flush >= ACCESS_FLUSH_SECONDS:
+            try:
+                db = self._db()
+                self._flush_touched(db, now)
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def _flush_touched(self, db, now):
+        self._last_flush = now
+        if self._touched:
+            db.executemany("UPDATE artifacts SET accessed = MAX(accessed, ?) WHERE key = ?", [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def _prune(self, db, now):
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        if self.ttl_seconds > 0:
+            self.counters["disk_evictions"] += db.execute("DELETE FROM artifacts WHERE accessed < ?", (now - self.ttl_seconds,)).rowcount
+        overflow = (db.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]) - self.disk_budget
+        if overflow <= 0:
+            return
+        doomed, freed = [], 0
+        for key, size in db.execute("SELECT key, size FROM artifacts ORDER BY accessed ASC").fetchall():
+            if freed >= overflow: break
+            doomed.append((key,))
+            freed += size
+        db.executemany("DELETE FROM artifacts WHERE key = ?", doomed)
+        self.counters["disk_evictions"] += len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            try:
+                disk_items, disk_bytes, raw_bytes = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM artifacts").fetchone()
+            except sqlite3.Error:
+                disk_items, disk_bytes, raw_bytes = 0, 0, 0
+            return {
+                **self.counters, "memory_items": len(self._memory), "memory_bytes": self._memory_bytes, "memory_budget": self.memory_budget,
+                "disk_items": disk_items, "disk_bytes": disk_bytes, "compression_ratio": round(raw_bytes / disk_bytes, 2) if disk_bytes else 0.0,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> ArtifactStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
+
+
+def put_artifact(value) -> str:
+    return get_session_store().put(value)
+
+
+def load_artifact(ref, default=None):
+    return get_session_store().get(ref, default)
+
+
+def derived_artifact(ref, name, builder):
+    return get_session_store().derived(ref, name, builder)
@@ -0,0 +1,73 @@
+# test_analysis_cache.py
+
+import analysis_cache
+from analysis_cache import AnalysisCache, make_key, normalize_text
+
+
+def _cache(tmp_path, **options):
+    return AnalysisCache(path=str(tmp_path / "cache.sqlite3"), **options)
+
+
+def test_normalized_text_gives_the_same_key():
+    assert normalize_text("  a \t b\r\n\r\n\r\n\nc  ") == "a b\n\nc"
+    assert make_key(normalize_text("a  b\n"), "en") == make_key("a b", "en") != make_key("a b", "hi")
+    assert make_key("ab", "c") != make_key("a", "bc")
+
+
+def test_memory_lru_falls_back_to_disk(tmp_path):
+    cache = _cache(tmp_path, memory_items=2)
+    for key in "abc":
+        cache.set(key, {"value": key})
+    assert list(cache._memory) == ["b", "c"]
+    assert cache.get("a") == {"value": "a"} and cache.counters["disk_hits"] == 1
+    assert list(cache._memory) == ["c", "a"]
+    assert cache.get("c") == {"value": "c"} and cache.counters["memory_hits"] == 1
+    assert cache.get("z") is None and cache.counters["misses"] == 1
+
+
+def test_disk_keeps_the_most_recently_used_items(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(analysis_cache.time, "time", lambda: clock[0])
+    cache = _cache(tmp_path, memory_items=0, max_items=2)
+    cache.set("a", 1)
+    clock[0] += 1; cache.set("b", 2)
+    clock[0] += 1; cache.get("a")
+    clock[0] += 1; cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["disk_items"] == 2 and cache.counters["evictions"] == 1
+
+
+def test_memory_hits_count_as_disk_accesses(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(analysis_cache.time, "time", lambda: clock[0])
+    cache = _cache(tmp_path, memory_items=10, max_items=2)
+    cache.set("hot", 1)
+    clock[0] += 1; cache.set("cold", 2)
+    for _ in range(3):
+        clock[0] += 60
+        assert cache.get("hot") == 1 and cache.get_many(["hot"]) == {"hot": 1}
+    clock[0] += 1; cache.set("new", 3)
+    cache._memory.clear()
+    assert cache.get("cold") is None and cache.get("hot") == 1 and cache.get("new") == 3
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(analysis_cache.time, "time", lambda: clock[0])
+    cache = _cache(tmp_path, ttl_seconds=60)
+    cache.set("a", 1)
+    clock[0] += 61
+    assert cache.get("a") is None and cache.get_many(["a"]) == {}
+    assert cache.stats()["disk_items"] == 0
+
+
+def test_get_many_and_set_many(tmp_path):
+    cache = _cache(tmp_path, memory_items=1)
+    cache.set_many((f"k{i}", {"i": i}) for i in range(3))
+    found = cache.get_many(["k0", "k1", "k2", "missing"])
+    assert found == {f"k{i}": {"i": i} for i in range(3)}
+    assert cache.counters["hits"] == 3 and cache.counters["misses"] == 1 and cache.counters["memory_hits"] == 1
+    cache.set_many([])
+    assert cache.counters["writes"] == 3
+    cache.clear()
+    assert cache.get_many(["k0"]) == {} and cache.stats()["disk_items"] == 0
@@ -0,0 +1,260 @@
+# test_backend.py
+
+import re
+import json
+
+import backend
+
+CLAUSES = [
+    "The Service Provider shall deliver the monthly report to the Client by the fifth working day.",
+    "The Client shall provide office space and internet access to the Service Provider's staff on site.",
+    "The Service Provider shall assign a named account manager who attends the quarterly review.",
+    "All deliverables shall be submitted in editable formats together with their source files.",
+    "The Service Provider shall maintain a register of change requests approved by the Client.",
+    "Training for the Client's staff shall be held at the Client's premises in Pune.",
+]
+
+
+def _contract(clauses):
+    return "SERVICE AGREEMENT between Acme Private Limited and Bharat Services LLP.\n" + "\n".join(f"{i}. {clause}" for i, clause in enumerate(clauses, 1))
+
+
+def _tagged_responder(drop=()):
+    def respond(contents, system_instruction=None, generation_config=None):
+        text = contents if isinstance(contents, str) else json.dumps(contents)
+        clause_ids = [int(clause_id) for clause_id in re.findall(r"\[Clause (\d+)\]", text) if int(clause_id) not in drop]
+        return json.dumps({
+            "summary_analysis": {"contract_type": "Service Agreement", "overall_risk_score": 40, "executive_summary": "Summary."},
+            "clause_analysis": [{"clause_id": clause_id, "risk_level": "Medium", "explanation": "x", "identified_issue": f"issue-for-clause-{clause_id}", "mitigation_suggestion": "y"} for clause_id in clause_ids],
+        })
+    return respond
+
+
+def _assert_findings_match_clauses(result):
+    for item in result["clause_analysis"]:
+        issue = item.get("identified_issue", "")
+        if issue.startswith("issue-for-clause-"):
+            assert issue == f"issue-for-clause-{item['clause_id']}"
+
+
+def test_dropped_clause_does_not_shift_cached_findings(fake_llm, fresh_caches):
+    # The preamble is clause 1, so numbered clause 2 is clause_id 3.
+    fake_llm(responder=_tagged_responder(drop={3}))
+    first = backend.get_ai_analysis(_contract(CLAUSES))
+    assert "error" not in first
+    _assert_findings_match_clauses(first)
+
+    fake_llm(responder=_tagged_responder())
+    revised = list(CLAUSES)
+    revised[4] = revised[4].replace("register", "log")
+    second = backend.get_ai_analysis(_contract(revised))
+    _assert_findings_match_clauses(second)
+    assert {item["clause_id"] for item in second["clause_analysis"]} == set(range(1, len(CLAUSES) + 2))
+
+
+def _recording_responder(prompts, part_score=40):
+    def respond(contents, system_instruction=None, generation_config=None):
+        prompts.append(contents)
+        if "Part summaries" in contents:
+            return json.dumps({"summary_analysis": {"contract_type": "Service Agreement", "involved_parties": ["Acme", "Bharat"], "executive_summary": "One summary for the whole contract.", "key_risk_areas": ["Payment"]}})
+        clause_ids = [int(clause_id) for clause_id in re.findall(r"\[Clause (\d+)\]", contents)]
+        return json.dumps({
+            "summary_analysis": {"contract_type": "Service Agreement", "overall_risk_score": part_score, "executive_summary": f"Part with clauses {clause_ids}.", "important_dates": [], "sections_summary": []},
+            "clause_analysis": [{"clause_id": clause_id, "risk_level": "Medium", "identified_issue": f"issue-for-clause-{clause_id}"} for clause_id in clause_ids],
+        })
+    return respond
+
+
+def test_chunked_parts_see_only_their_clauses_and_reduce_once(fake_llm):
+    prompts = []
+    fake_llm(responder=_recording_responder(prompts))
+    long_clauses = [f"{clause} " * 180 for clause in CLAUSES[:3]]
+    known = {3: {"clause_id": 4, "risk_level": "High", "identified_issue": "Unilateral termination"}}
+    result = backend._get_llm_json_chunked(long_clauses, "en", clause_ids=[1, 2, 3], context_notes="Previous summary_analysis: {...}", known=known)
+
+    part_prompts = [prompt for prompt in prompts if "Part summaries" not in prompt]
+    assert len(part_prompts) == 3 and len(prompts) == 4
+    for clause_id, prompt in zip([1, 2, 3], sorted(part_prompts, key=lambda p: re.search(r"\[Clause (\d+)\]", p).group(1))):
+        assert re.findall(r"\[Clause (\d+)\]", prompt) == [str(clause_id)]
+        assert "Previous summary_analysis" not in prompt and "already been reviewed" not in prompt
+    assert "Unilateral termination" in prompts[-1]
+
+    summary = result["summary_analysis"]
+    assert summary["executive_summary"] == "One summary for the whole contract."
+    assert summary["overall_risk_score"] == round((40 * 3 + 85) / 4)
+    assert [item["clause_id"] for item in result["clause_analysis"]] == [1, 2, 3]
+
+
+def test_chunked_summary_falls_back_to_merge_when_reduce_fails(fake_llm):
+    prompts = []
+    respond = _recording_responder(prompts)
+    fake_llm(responder=lambda contents, *args: "not json" if "Part summaries" in contents else respond(contents, *args))
+    result = backend._get_llm_json_chunked([f"{clause} " * 180 for clause in CLAUSES[:2]], "en")
+    assert "Part with clauses [1]" in result["summary_analysis"]["executive_summary"]
+    assert result["summary_analysis"]["overall_risk_score"] == 40
+
+
+STREAMED = json.dumps({
+    "summary_analysis": {"contract_type": "Service \"Agreement\"", "overall_risk_score": 40, "key_risk_areas": ["a, b", "c]"]},
+    "clause_analysis": [{"clause_id": i, "risk_level": "Low", "explanation": "brace } and \\\\ escape {"} for i in range(1, 6)],
+})
+
+
+def test_partial_json_fed_in_chunks_matches_whole_prefix_parse():
+    for size in (1, 3, 7, 64):
+        parser, last = backend.PartialJSONParser(), None
+        for start in range(0, len(STREAMED), size):
+            value = parser.feed(STREAMED[start:start + size])
+            whole = backend.parse_partial_json(STREAMED[:start + size])
+            if whole is not None: last = whole
+            assert value == last
+        assert value == json.loads(STREAMED) and parser.text == STREAMED
+
+
+def test_partial_json_keeps_string_state_across_chunks():
+    parser = backend.PartialJSONParser()
+    assert parser.feed('{"a": "x\\') == {}
+    assert parser.feed('", }", "b": 1') == {"a": 'x", }'}
+    assert parser.feed(', "c": [1, 2') == {"a": 'x", }', "b": 1, "c": [1]}
+
+
+def test_partial_json_parses_only_when_a_field_completes(monkeypatch):
+    calls = []
+    real_loads = json.loads
+    monkeypatch.setattr(backend.json, "loads", lambda text: calls.append(text) or real_loads(text))
+    parser = backend.PartialJSONParser()
+    parser.feed('{"clause_analysis": [{"clause_id": 1}')
+    count = len(calls)
+    for ch in ', {"explanation": "' + "x" * 500:
+        parser.feed(ch)
+    assert len(calls) == count
+
+
+def test_clause_fingerprint_ignores_whitespace_but_not_wording_or_language():
+    clause = CLAUSES[0]
+    assert backend._fingerprint_clause(clause, "en") == backend._fingerprint_clause("  " + clause.replace(" ", "  \t") + "\r\n", "en")
+    assert backend._fingerprint_clause(clause, "en") != backend._fingerprint_clause(clause.replace("fifth", "tenth"), "en")
+    assert backend._fingerprint_clause(clause, "en") != backend._fingerprint_clause(clause, "hi")
+    assert backend._fingerprint_clause("3. " + clause, "en") == backend._fingerprint_clause("\n4.  " + clause, "en") == backend._fingerprint_clause(clause, "en")
+    assert backend._fingerprint_clause("3. 10 days", "en") != backend._fingerprint_clause("3. 20 days", "en")
+
+
+def test_match_clause_results_by_id_then_by_position():
+    items = [{"clause_id": "5", "issue": "b"}, {"clause_id": 2, "issue": "a"}]
+    assert backend._match_clause_results({"clause_analysis": items}, [2, 5]) == [items[1], items[0]]
+    unnumbered = [{"issue": "a"}, {"issue": "b"}]
+    assert backend._match_clause_results({"clause_analysis": unnumbered}, [2, 5]) == unnumbered
+    assert backend._match_clause_results({"clause_analysis": [{"clause_id": 2}]}, [2, 5]) is None
+    assert backend._match_clause_results({"clause_analysis": [{"clause_id": 2}, {"clause_id": 9}, "junk"]}, [2, 5]) == [{"clause_id": 2}, {"clause_id": 9}]
+
+
+def test_batch_clauses_respects_token_budget_and_keeps_ids():
+    clauses = ["a" * 40, "b" * 40, "c" * 200, "d" * 4]
+    batches = backend._batch_clauses(clauses, [3, 4, 5, 6], token_budget=30)
+    assert batches == [(["a" * 40, "b" * 40], [3, 4]), (["c" * 200], [5]), (["d" * 4], [6])]
+    assert backend._batch_clauses([], [], token_budget=30) == []
+
+
+def test_batch_clauses_caps_clauses_per_batch():
+    clauses = [f"{i}. The Service Provider shall file report {i}." for i in range(1, 61)]
+    batches = backend._batch_clauses(clauses, list(range(1, 61)), token_budget=100000, max_clauses=25)
+    assert [len(ids) for _, ids in batches] == [25, 25, 10]
+    assert [clause_id for _, ids in batches for clause_id in ids] == list(range(1, 61))
+    assert max(len(ids) for _, ids in backend._batch_clauses(clauses, list(range(1, 61)))) <= backend.CHUNK_MAX_CLAUSES
+
+
+def test_reduce_analyses_weights_parts_and_dedupes():
+    partials = [
+        {"summary_analysis": {"contract_type": "Loan Agreement", "overall_risk_score": 80, "involved_parties": ["Acme", "Bharat"], "executive_summary": "First.", "key_risk_areas": ["Interest"],
+                              "important_dates": [{"date": "1 May", "context": "start"}], "sections_summary": [{"section_name": "Payment", "simple_explanation": "x"}]},
+         "clause_analysis": [{"clause_id": 1}, {"clause_id": 2}, {"clause_id": 3}]},
+        {"summary_analysis": {"contract_type": "Loan Agreement", "overall_risk_score": "20", "involved_parties": ["acme ", "Chennai Bank"], "executive_summary": "First.", "key_risk_areas": "interest",
+                              "important_dates": [{"context": "start", "date": "1 May"}], "sections_summary": [{"section_name": "payment", "simple_explanation": "y"}]},
+         "clause_analysis": [{"clause_id": 4}]},
+        {"summary_analysis": {"overall_risk_score": "n/a"}, "clause_analysis": {"clause_id": 5}},
+    ]
+    summary = backend._reduce_analyses(partials, [3, 1, 1])["summary_analysis"]
+    assert summary["overall_risk_score"] == round((80 * 3 + 20) / 4)
+    assert summary["contract_type"] == "Loan Agreement"
+    assert summary["involved_parties"] == ["Acme", "Bharat", "Chennai Bank"]
+    assert summary["executive_summary"] == "First." and summary["key_risk_areas"] == ["Interest"]
+    assert len(summary["important_dates"]) == 1 and len(summary["sections_summary"]) == 1
+    assert [item["clause_id"] for item in backend._reduce_analyses(partials, [3, 1, 1])["clause_analysis"]] == [1, 2, 3, 4, 5]
+
+
+def test_reduce_analyses_scores_known_findings_without_parts():
+    known = {0: {"risk_level": "High"}, 1: {"risk_level": "Low"}}
+    summary = backend._reduce_analyses([], [], known)["summary_analysis"]
+    assert summary["overall_risk_score"] == round((85 + 10) / 2) and summary["contract_type"] == "N/A"
+    assert backend._reduce_analyses([{}], [1])["summary_analysis"]["overall_risk_score"] == 0
+
+
+def test_with_known_clauses_merges_in_order_and_returns_final_value():
+    def partials():
+        yield {"summary_analysis": {}, "clause_analysis": [{"clause_id": 3}]}
+        yield {"summary_analysis": {}, "clause_analysis": [{"clause_id": 3}, {"clause_id": 1}]}
+        return {"done": True}
+
+    known = {1: {"clause_id": 2}}
+    generator = backend._with_known_clauses(partials(), known)
+    assert [item["clause_id"] for item in next(generator)["clause_analysis"]] == [2, 3]
+    assert [item["clause_id"] for item in next(generator)["clause_analysis"]] == [1, 2, 3]
+    assert backend._drain(generator) == {"done": True}
+
+
+def test_revised_contract_sends_only_the_changed_clause(fake_llm, fresh_caches):
+    prompts = []
+    respond = _tagged_responder()
+    fake_llm(responder=lambda contents, *args: prompts.append(contents) or respond(contents, *args))
+    backend.get_ai_analysis(_contract(CLAUSES))
+    assert sorted(map(int, re.findall(r"\[Clause (\d+)\]", prompts[-1]))) == list(range(1, len(CLAUSES) + 2))
+
+    revised = list(CLAUSES)
+    revised[2] = revised[2].replace("quarterly", "monthly")
+    prompts.clear()
+    result = backend.get_ai_analysis(_contract(revised))
+    # Known findings are listed in the notes; only the supplied clauses start a line with their marker.
+    assert len(prompts) == 1 and re.findall(r"^\[Clause (\d+)\]$", prompts[0], re.M) == ["4"]
+    assert "Previous summary_analysis" in prompts[0]
+    _assert_findings_match_clauses(result)
+    assert [item["clause_id"] for item in result["clause_analysis"]] == list(range(1, len(CLAUSES) + 2))
+
+    prompts.clear()
+    assert backend.get_ai_analysis(_contract(revised)) == result and prompts == []
+
+
+def test_document_without_text_is_an_error(fake_llm, fresh_caches):
+    prompts = []
+    fake_llm(responder=lambda contents, *args: prompts.append(contents) or "{}")
+    for text in ("", "\n\n\x0c\n \n", "Page 1"):
+        assert "No text could be extracted" in backend.get_ai_analysis(text)["error"]
+        assert "No text could be extracted" in backend.get_ai_analysis(text, offline=True)["error"]
+    assert prompts == []
+
+
+def _content_responder(prompts):
+    def respond(contents, system_instruction=None, generation_config=None):
+        prompts.append(contents)
+        supplied = re.findall(r"^\[Clause (\d+)\]\n(?:\d+\. )?(.*)$", contents, re.M)
+        return json.dumps({
+            "summary_analysis": {"contract_type": "Service Agreement", "overall_risk_score": 40, "executive_summary": "Summary."},
+            "clause_analysis": [{"clause_id": int(clause_id), "risk_level": "Medium", "identified_issue": body[:40]} for clause_id, body in supplied],
+        })
+    return respond
+
+
+def test_inserting_a_clause_sends_only_the_new_clause(fake_llm, fresh_caches):
+    prompts = []
+    fake_llm(responder=_content_responder(prompts))
+    backend.get_ai_analysis(_contract(CLAUSES))
+
+    inserted = CLAUSES[:1] + ["The Client shall nominate a single point of contact for all approvals under this Agreement."] + CLAUSES[1:]
+    prompts.clear()
+    result = backend.get_ai_analysis(_contract(inserted))
+    assert len(prompts) == 1 and re.findall(r"^\[Clause (\d+)\]$", prompts[0], re.M) == ["3"]
+    assert [item["identified_issue"] for item in result["clause_analysis"][1:]] == [clause[:40] for clause in inserted]
+    assert [item["clause_id"] for item in result["clause_analysis"]] == list(range(1, len(inserted) + 2))
+
+    prompts.clear()
+    backend.get_ai_analysis(_contract(CLAUSES[:2] + CLAUSES[3:]))
+    assert all(not re.findall(r"^\[Clause (\d+)\]$", prompt, re.M) for prompt in prompts)
@@ -0,0 +1,58 @@
+# test_batch_analyze.py
+
+import io
+import json
+
+import backend
+from batch_analyze import drop_partial_line, load_completed, run_batch
+
+CONTRACT = "SERVICE AGREEMENT between Acme Private Limited and Bharat Services LLP.\n1. The Service Provider shall deliver the monthly report by the fifth working day.\n2. Training for the Client's staff shall be held at the Client's premises in Pune.\n"
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_offline_fallback_is_degraded_and_retried_on_resume(tmp_path, fake_llm, fresh_caches, monkeypatch):
+    monkeypatch.setattr(backend, "ANALYSIS_OFFLINE_FALLBACK", True)
+    contract = tmp_path / "contract.txt"
+    contract.write_text(CONTRACT, encoding="utf-8")
+    output = str(tmp_path / "results.jsonl")
+
+    fake_llm(fail_every=1)
+    counts = run_batch([str(contract)], output, extract_workers=1, llm_workers=1, requests_per_minute=0, log=io.StringIO())
+    assert counts == {"ok": 0, "degraded": 1, "error": 0}
+    assert _records(output)[0]["status"] == "degraded" and "notice" in _records(output)[0]["analysis"]
+    assert load_completed(output) == set()
+
+    fake_llm()
+    counts = run_batch([str(contract)], output, extract_workers=1, llm_workers=1, requests_per_minute=0, log=io.StringIO())
+    assert counts == {"ok": 1, "degraded": 0, "error": 0}
+    assert load_completed(output) == {str(contract)}
+
+
+def test_resume_after_a_torn_last_line(tmp_path, fake_llm, fresh_caches):
+    contracts = []
+    for name in ("a", "b"):
+        contracts.append(tmp_path / f"{name}.txt")
+        contracts[-1].write_text(CONTRACT.replace("Pune", name), encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    fake_llm()
+    run_batch([str(contracts[0])], str(output), extract_workers=1, llm_workers=1, requests_per_minute=0, log=io.StringIO())
+    complete = output.read_bytes()
+    output.write_bytes(complete + b'{"path": "' + str(contracts[1]).encode() + b'", "status": "o')
+
+    counts = run_batch([str(path) for path in contracts], str(output), extract_workers=1, llm_workers=1, requests_per_minute=0, log=io.StringIO())
+    assert counts == {"ok": 1, "degraded": 0, "error": 0}
+    assert [record["path"] for record in _records(output)] == [str(path) for path in contracts]
+    assert load_completed(str(output)) == {str(path) for path in contracts}
+
+
+def test_drop_partial_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    for content, expected in ((b"", b""), (b"{}\n", b"{}\n"), (b"{}\n{\"pa", b"{}\n"), (b"no newline at all", b""), (b"{}\n" * 40000 + b"x" * 70000, b"{}\n" * 40000)):
+        path.write_bytes(content)
+        drop_partial_line(str(path))
+        assert path.read_bytes() == expected
+    drop_partial_line(str(tmp_path / "missing.jsonl"))
@@ -0,0 +1,49 @@
+# test_benchmark.py
+
+import io
+import json
+
+import benchmark
+
+
+def test_synthetic_contract_is_deterministic_and_numbered():
+    pages = benchmark.make_contract_pages(3, "en", seed=1)
+    assert pages == benchmark.make_contract_pages(3, "en", seed=1) != benchmark.make_contract_pages(3, "en", seed=2)
+    assert all(len(page) >= benchmark.CHARS_PER_PAGE for page in pages)
+    numbers = [int(line.split(".", 1)[0]) for page in pages for line in page.split("\n") if line[:1].isdigit()]
+    assert numbers == list(range(1, len(numbers) + 1))
+    assert benchmark.make_contract_pages(1, "hi")[0].startswith("सेवा अनुबंध")
+
+
+def test_corpus_files_are_generated_once(tmp_path):
+    log = io.StringIO()
+    documents, skipped = benchmark.build_corpus(str(tmp_path), [1, 2], ["en"], ["txt", "docx"], log=log)
+    assert [(d["pages"], d["format"]) for d in documents] == [(1, "txt"), (1, "docx"), (2, "txt"), (2, "docx")] and skipped == []
+    log = io.StringIO()
+    assert benchmark.build_corpus(str(tmp_path), [1, 2], ["en"], ["txt", "docx"], log=log)[0] == documents
+    assert log.getvalue() == ""
+
+
+def test_run_benchmarks_reports_each_stage(tmp_path, fake_llm, fresh_caches):
+    documents, _ = benchmark.build_corpus(str(tmp_path), [2], ["en"], ["txt"], log=io.StringIO())
+    stages = {"extract", "segment", "reformat", "reformat_baseline", "analysis", "analysis_offline"}
+    rows = benchmark.run_benchmarks(documents, stages, repeat=1, warmup=0, llm_latency=0, log=io.StringIO())
+    by_stage = {row["stage"]: row for row in rows}
+    assert set(by_stage) == stages
+    assert by_stage["extract"]["format"] == "txt" and by_stage["segment"]["format"] == "text"
+    assert by_stage["analysis"]["llm_calls_per_run"] >= 1 and by_stage["analysis_offline"]["llm_calls_per_run"] == 0
+    assert all(row["p50_ms"] >= 0 and row["pages"] == 2 for row in rows)
+
+
+def test_compare_flags_slowdowns_over_the_threshold(tmp_path):
+    row = lambda stage, p50: {"stage": stage, "format": "text", "language": "en", "pages": 10, "p50_ms": p50}
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": [row("segment", 10.0), row("index", 10.0), row("reformat", 0.0)]}), encoding="utf-8")
+    regressions = benchmark.compare(str(baseline), [row("segment", 10.5), row("index", 12.0), row("reformat", 5.0), row("chat", 1.0)], threshold=0.10, log=io.StringIO())
+    assert [(r["stage"], r["change"]) for r in regressions] == [("index", 0.2)]
+
+
+def test_baseline_find_section():
+    text = "This is made between A and B. Term one year."
+    assert benchmark.baseline_find_section(text, ["between"], ["term"]) == "between A and B."
+    assert benchmark.baseline_find_section(text, ["arbitration"], []) == ""
@@ -0,0 +1,44 @@
+# test_chatbot.py
+
+from chatbot import PREAMBLE_CHARS, _build_chat_request, _build_context, _window_history, build_clause_index
+
+CONTRACT = "SERVICE AGREEMENT between Acme Private Limited and Bharat Services LLP. " + "Recital. " * 100 + """
+1. Payment. The Client shall pay every invoice within thirty days of receipt.
+2. Jurisdiction. The courts at Mumbai shall have exclusive jurisdiction over any dispute.
+"""
+
+
+def _messages(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(n)]
+
+
+def test_window_drops_the_pending_query_and_keeps_recent_turns():
+    history = _messages(10) + [{"role": "user", "content": "When is payment due?"}]
+    window = _window_history(history, "When is payment due?", max_messages=4)
+    assert [message["content"] for message in window] == ["message 6", "message 7", "message 8", "message 9"]
+
+
+def test_window_never_starts_with_the_assistant():
+    window = _window_history(_messages(9), "next question", max_messages=4)
+    assert window[0]["role"] == "user" and [message["content"] for message in window] == ["message 6", "message 7", "message 8"]
+    assert _window_history(_messages(4), "q", max_messages=0) == []
+    assert _window_history([], "q") == []
+
+
+def test_context_includes_the_preamble_and_matching_clauses():
+    index = build_clause_index(CONTRACT)
+    context = _build_context("Which courts have jurisdiction?", index, top_k=1)
+    assert context.startswith("[Excerpt 1]\nSERVICE AGREEMENT between Acme")
+    assert "[Excerpt 3]\n2. Jurisdiction." in context and "Payment" not in context
+    assert len(context.split("[Excerpt 3]")[0].strip()) == len("[Excerpt 1]\n") + PREAMBLE_CHARS
+    assert _build_context("anything", build_clause_index("")) == "(No matching clauses were found in the contract.)"
+
+
+def test_request_size_stays_flat_as_the_chat_grows():
+    index = build_clause_index(CONTRACT)
+    sizes = []
+    for turns in (2, 20, 200):
+        _, contents = _build_chat_request("When is payment due?", _messages(turns), CONTRACT, "en", index)
+        sizes.append(len(contents))
+        assert "1. Payment." in contents[-1]["parts"][0]
+    assert sizes[1] == sizes[2]
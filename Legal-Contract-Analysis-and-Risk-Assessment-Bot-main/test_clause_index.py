@@ -0,0 +1,53 @@
+# test_clause_index.py
+
+from clause_index import MAX_PASSAGE_CHARS, ClauseIndex, _split_long, tokenize
+
+CONTRACT = """SERVICE AGREEMENT between Acme Private Limited and Bharat Services LLP.
+1. Payment. The Client shall pay every invoice within thirty days of receipt.
+2. Termination. Either party may terminate this Agreement with sixty days written notice.
+3. Confidentiality. Each party shall keep the other party's information confidential.
+4. Jurisdiction. The courts at Mumbai shall have exclusive jurisdiction over any dispute.
+"""
+
+
+def test_tokenize_drops_stopwords_and_keeps_devanagari_marks():
+    assert tokenize("What are the PAYMENT terms?") == ["payment", "terms"]
+    assert tokenize("भुगतान की शर्तें क्या हैं?") == ["भुगतान", "शर्तें", "हैं"]
+
+
+def test_search_ranks_the_matching_clause_first_and_returns_contract_order():
+    index = ClauseIndex.from_text(CONTRACT)
+    assert len(index.passages) == 5
+    scores = index.scores("Which courts have jurisdiction?")
+    assert max(range(len(scores)), key=scores.__getitem__) == 4
+    hits = index.search("terminate with notice or pay an invoice", k=2)
+    assert [i for i, _ in hits] == [1, 2]
+    assert index.search("unrelated astronomy question") == []
+
+
+def test_rare_terms_outweigh_common_ones():
+    index = ClauseIndex(["party party party payment", "party notice", "party notice", "party notice"])
+    scores = index.scores("party payment")
+    assert scores[0] > max(scores[1:]) > 0
+    assert ClauseIndex([]).search("payment") == []
+
+
+def test_hindi_query_finds_hindi_clause():
+    index = ClauseIndex.from_text("सेवा अनुबंध एक्मे और भारत के बीच किया गया है।\n1. भुगतान तीस दिनों के भीतर किया जाएगा।\n2. विवाद का निपटारा मुंबई के न्यायालय में होगा।")
+    assert index.search("भुगतान कब होगा?", k=1)[0][0] == 1
+
+
+def test_long_single_paragraph_is_split_on_sentences():
+    clause = "12. Payment. " + " ".join(f"The Client shall pay invoice number {i} within thirty days of receipt." for i in range(100))
+    pieces = _split_long(clause)
+    assert len(pieces) > 1 and all(len(piece) <= MAX_PASSAGE_CHARS for piece in pieces)
+    assert " ".join(pieces) == clause
+    assert all(piece.endswith("receipt.") for piece in pieces)
+
+
+def test_long_hindi_and_unbroken_text_is_split():
+    clause = ("भुगतान तीस दिनों के भीतर किया जाएगा। " * 80).strip()
+    pieces = _split_long(clause)
+    assert len(pieces) > 1 and all(len(piece) <= MAX_PASSAGE_CHARS and piece.endswith("।") for piece in pieces)
+    assert all(len(piece) <= MAX_PASSAGE_CHARS for piece in _split_long("x" * 4000))
+    assert _split_long("short clause") == ["short clause"]
@@ -0,0 +1,89 @@
+# test_jobs.py
+
+import time
+
+import pytest
+
+import backend
+import jobs
+from jobs import JobQueue
+
+
+def _wait(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def queue_factory(tmp_path):
+    queues = []
+
+    def make(handlers, workers=2):
+        queue = JobQueue(path=str(tmp_path / "jobs.sqlite3"), workers=workers, handlers=handlers)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def test_streamed_partials_and_final_result(queue_factory):
+    def handler(payload):
+        for i in range(3):
+            yield {"step": i}
+
+    queue = queue_factory({"count": handler})
+    job = _wait(queue, queue.submit("count", {}))
+    assert job["status"] == "done" and job["result"] == {"step": 2} and job["partial"] is None
+
+
+def test_done_job_is_reused_but_errors_and_fallbacks_are_retried(queue_factory):
+    results = [{"notice": "AI analysis was unavailable"}, {"error": "boom"}, {"ok": True}, {"ok": "again"}]
+    queue = queue_factory({"analysis": lambda payload: results.pop(0)})
+    for expected in ({"notice": "AI analysis was unavailable"}, {"error": "boom"}, {"ok": True}, {"ok": True}):
+        job = _wait(queue, queue.submit("analysis", {}, dedupe_key="same-contract"))
+        assert job["result"] == expected
+    assert results == [{"ok": "again"}]
+
+
+def test_failed_handler_is_recorded(queue_factory):
+    def handler(payload):
+        raise ValueError("bad payload")
+
+    queue = queue_factory({"broken": handler})
+    job = _wait(queue, queue.submit("broken", {}))
+    assert job["status"] == "failed" and "bad payload" in job["error"]
+
+
+def test_unknown_kind_is_rejected(queue_factory):
+    with pytest.raises(ValueError):
+        queue_factory({}).submit("missing", {})
+
+
+def test_interrupted_jobs_are_requeued_on_start(queue_factory, tmp_path):
+    queue = queue_factory({"analysis": lambda payload: {"ok": True}}, workers=1)
+    queue._execute("INSERT INTO jobs (id, kind, payload, status, created) VALUES ('stuck', 'analysis', '{}', 'running', ?)", (time.time(),))
+    restarted = queue_factory({"analysis": lambda payload: {"ok": True}})
+    assert _wait(restarted, "stuck")["result"] == {"ok": True}
+
+
+def test_analysis_dedupe_key_follows_prompt_and_rules_versions(monkeypatch):
+    class Recorder:
+        def submit(self, kind, payload, dedupe_key=None):
+            keys.append(dedupe_key)
+
+    keys = []
+    monkeypatch.setattr(jobs, "get_job_queue", Recorder)
+    jobs.submit_analysis("1. The Client shall pay within 30 days.", "en")
+    jobs.submit_analysis("1.  The Client shall pay within 30 days.\n", "en")
+    monkeypatch.setattr(backend, "RULES_VERSION", "next")
+    jobs.submit_analysis("1. The Client shall pay within 30 days.", "en")
+    monkeypatch.setattr(backend, "PROMPT_VERSION", "next")
+    jobs.submit_analysis("1. The Client shall pay within 30 days.", "en")
+    assert keys[0] == keys[1] and len(set(keys)) == 3
@@ -0,0 +1,88 @@
+# test_llm_client.py
+
+import gc
+import asyncio
+import json
+import threading
+
+import pytest
+
+from llm_client import FakeAPIError, FakeBackend, LLMClient, TokenBucket
+
+JSON_CONFIG = {"response_mime_type": "application/json"}
+
+
+def _client(backend=None, **options):
+    return LLMClient(backend=backend or FakeBackend(), requests_per_minute=0, **options)
+
+
+def test_fake_backend_answers_every_clause():
+    text = _client().generate("[Clause 1]\nA\n\n[Clause 4]\nB", generation_config=JSON_CONFIG)
+    assert [item["clause_id"] for item in json.loads(text)["clause_analysis"]] == [1, 4]
+
+
+def test_retryable_errors_are_retried():
+    client = _client(FakeBackend(fail_every=2), max_retries=2)
+    client._backoff = lambda attempt: 0
+    for _ in range(3):
+        client.generate("hello")
+    assert client.stats()["retries"] == 2 and client.stats()["failures"] == 0
+
+
+def test_retries_are_bounded():
+    client = _client(FakeBackend(fail_every=1), max_retries=1)
+    client._backoff = lambda attempt: 0
+    with pytest.raises(FakeAPIError):
+        client.generate("hello")
+    assert client.stats()["failures"] == 1
+
+
+def test_stream_holds_its_concurrency_slot_until_consumed():
+    client = _client(FakeBackend(chunk_size=4, chunk_delay=0.005), max_concurrency=1)
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def consume():
+        stream = client.generate("a question about the contract", stream=True)
+        for i, _ in enumerate(stream):
+            if i == 0:
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+        with lock:
+            active[0] -= 1
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert peak[0] == 1
+
+
+def test_abandoned_and_closed_streams_release_their_slot():
+    client = _client(max_concurrency=1)
+    stream = client.generate("unused", stream=True)
+    del stream
+    gc.collect()
+    assert client._slots.acquire(blocking=False)
+    client._slots.release()
+
+    stream = client.generate("partly read", stream=True)
+    next(stream)
+    stream.close()
+    assert client._slots.acquire(blocking=False)
+    client._slots.release()
+
+
+def test_token_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(requests_per_minute=60, burst=2)
+    assert bucket._reserve() == 0 and bucket._reserve() == 0
+    assert bucket._reserve() > 0.5
+
+
+def test_async_calls_work_across_event_loops():
+    client = _client(FakeBackend(latency=0.01), max_concurrency=1)
+
+    async def burst():
+        return await asyncio.gather(*(client.agenerate(f"question {i}") for i in range(3)))
+
+    for _ in range(2):
+        assert len(asyncio.run(burst())) == 3
@@ -0,0 +1,79 @@
+# test_metrics.py
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(metrics, "_collectors", [])
+
+
+def _clock(monkeypatch, *times):
+    ticks = iter(times)
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(ticks))
+
+
+def test_histogram_buckets_are_cumulative():
+    for seconds in (0.003, 0.2, 0.2, 45.0, 500.0):
+        metrics.observe("extract", seconds, format="pdf")
+    lines = metrics.render_prometheus().splitlines()
+    assert lines[0] == "# TYPE riskbot_stage_duration_seconds histogram"
+    bucket = lambda le: next(line for line in lines if f'le="{le}"' in line).rsplit(" ", 1)[1]
+    assert [bucket(le) for le in ("0.005", "0.1", "0.25", "30.0", "60.0", "120.0", "+Inf")] == ["1", "1", "3", "3", "4", "4", "5"]
+    assert 'riskbot_stage_duration_seconds_bucket{format="pdf",stage="extract",le="0.005"} 1' in lines
+    assert 'riskbot_stage_duration_seconds_sum{format="pdf",stage="extract"} 545.403000' in lines
+    assert 'riskbot_stage_duration_seconds_count{format="pdf",stage="extract"} 5' in lines
+
+
+def test_label_values_are_escaped():
+    metrics.inc("files_total", path='C:\\contracts\\"final"\nv2.pdf')
+    assert 'riskbot_files_total{path="C:\\\\contracts\\\\\\"final\\"\\nv2.pdf"} 1' in metrics.render_prometheus().splitlines()
+
+
+def test_counters_keep_full_precision():
+    metrics.inc("llm_tokens_total", 1234567, kind="prompt")
+    metrics.inc("llm_cost_usd_total", 0.1234567)
+    lines = metrics.render_prometheus().splitlines()
+    assert 'riskbot_llm_tokens_total{kind="prompt"} 1234567' in lines
+    assert "riskbot_llm_cost_usd_total 0.1234567" in lines
+    assert lines.count("# TYPE riskbot_llm_tokens_total counter") == 1
+
+
+def test_collectors_export_gauges_and_total_counters():
+    metrics.register_collector(lambda: [("cache_hits_total", {"cache": "analysis"}, 7), ("cache_items", {"tier": "disk", "cache": "analysis"}, 3)])
+    metrics.register_collector(lambda: 1 / 0)
+    lines = metrics.render_prometheus().splitlines()
+    assert lines == [
+        "# TYPE riskbot_cache_hits_total counter", 'riskbot_cache_hits_total{cache="analysis"} 7',
+        "# TYPE riskbot_cache_items gauge", 'riskbot_cache_items{cache="analysis",tier="disk"} 3',
+    ]
+    assert metrics.snapshot()["counters"] == {"cache_hits_total cache=analysis": 7, "cache_items cache=analysis tier=disk": 3}
+
+
+def test_timed_iter_records_first_chunk_and_total(monkeypatch):
+    _clock(monkeypatch, 10.0, 10.5, 12.0)
+    assert list(metrics.timed_iter(iter("abc"), "chat", first_stage="chat_first_token", model="m")) == ["a", "b", "c"]
+    stages = metrics.snapshot()["stages"]
+    assert stages["chat_first_token model=m"]["total_seconds"] == 0.5
+    assert stages["chat model=m"]["total_seconds"] == 2.0 and stages["chat model=m"]["count"] == 1
+
+
+def test_timed_iter_records_an_abandoned_stream_once(monkeypatch):
+    _clock(monkeypatch, 0.0, 0.25, 1.0)
+    chunks = metrics.timed_iter(iter("abc"), "chat", first_stage="chat_first_token")
+    assert next(chunks) == "a"
+    chunks.close()
+    stages = metrics.snapshot()["stages"]
+    assert stages["chat_first_token"]["count"] == 1 and stages["chat"]["total_seconds"] == 1.0
+
+
+def test_span_records_even_when_the_body_raises(monkeypatch):
+    _clock(monkeypatch, 1.0, 4.0)
+    with pytest.raises(ValueError):
+        with metrics.span("parse"):
+            raise ValueError("bad")
+    assert metrics.snapshot()["stages"]["parse"] == {"count": 1, "total_seconds": 3.0, "avg_ms": 3000.0, "p50_ms": 3000.0, "p95_ms": 3000.0}
@@ -0,0 +1,71 @@
+# test_pdf_extractor.py
+
+import hashlib
+
+import pytest
+
+import pdf_extractor
+from analysis_cache import make_key
+from benchmark import write_pdf
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    def make(pages, tag):
+        path = tmp_path / f"{tag}.pdf"
+        write_pdf([f"{tag} page {i}" for i in range(pages)], str(path))
+        return path.read_bytes()
+    return make
+
+
+def _keys(file_bytes, pages):
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    return [make_key(file_hash, index, pdf_extractor.EXTRACTOR_VERSION) for index in range(pages)]
+
+
+def test_page_ranges_split_runs_into_chunks():
+    assert pdf_extractor._page_ranges([0, 1, 2, 3, 4, 5, 6, 7], 1) == [(0, 2), (2, 4), (4, 6), (6, 8)]
+    assert pdf_extractor._page_ranges([0, 1, 4, 5, 6, 9], 2) == [(0, 1), (1, 2), (4, 5), (5, 6), (6, 7), (9, 10)]
+    assert pdf_extractor._page_ranges([3, 4, 5], 8) == [(3, 4), (4, 5), (5, 6)]
+    assert pdf_extractor._page_ranges([], 4) == []
+
+
+def test_pages_are_cached_after_the_first_read(make_pdf, monkeypatch):
+    file_bytes = make_pdf(5, "serial")
+    calls = []
+    real_page_text = pdf_extractor._page_text
+    monkeypatch.setattr(pdf_extractor, "_page_text", lambda doc, index: calls.append(index) or real_page_text(doc, index))
+
+    stats = {}
+    first = list(pdf_extractor.extract_pdf_pages(file_bytes, workers=1, stats=stats))
+    assert [text.strip() for text in first] == [f"serial page {i}" for i in range(5)]
+    assert calls == [0, 1, 2, 3, 4] and stats["pages"] == 5 and stats["cached_pages"] == 0
+
+    calls.clear(); stats = {}
+    assert list(pdf_extractor.extract_pdf_pages(file_bytes, workers=1, stats=stats)) == first
+    assert calls == [] and stats["cached_pages"] == 5 and stats["pages_done"] == 5
+
+    assert list(pdf_extractor.extract_pdf_pages(file_bytes, workers=1, use_cache=False)) == first
+    assert calls == [0, 1, 2, 3, 4]
+
+
+def test_parallel_extraction_keeps_page_order_around_cached_pages(make_pdf, monkeypatch):
+    file_bytes = make_pdf(12, "parallel")
+    keys = _keys(file_bytes, 12)
+    pdf_extractor._page_cache.set_many([(keys[3], "cached 3"), (keys[4], "cached 4"), (keys[10], "cached 10")])
+    contexts = []
+
+    class RecordingPool(pdf_extractor.ProcessPoolExecutor):
+        def __init__(self, max_workers=None, mp_context=None):
+            contexts.append(mp_context.get_start_method())
+            super().__init__(max_workers=max_workers, mp_context=mp_context)
+
+    monkeypatch.setattr(pdf_extractor, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(pdf_extractor, "PDF_PARALLEL_MIN_PAGES", 2)
+    stats = {}
+    texts = [text.strip() for text in pdf_extractor.extract_pdf_pages(file_bytes, workers=2, stats=stats)]
+    expected = [f"parallel page {i}" for i in range(12)]
+    expected[3], expected[4], expected[10] = "cached 3", "cached 4", "cached 10"
+    assert texts == expected
+    assert contexts == ["spawn"] and stats["workers"] == 2 and stats["cached_pages"] == 3
+    assert pdf_extractor._page_cache.get(keys[11]).strip() == "parallel page 11"
@@ -0,0 +1,54 @@
+# test_reformatter.py
+
+import pytest
+
+from benchmark import baseline_find_section, make_contract_pages
+from reformatter import PARTIES_STOPS, SECTION_KEYWORDS, SectionIndex, reformat_contract_as_template
+
+PLAIN_TEXTS = [
+    "This agreement is made BETWEEN Acme Ltd and Bharat LLP. The term of this agreement is two years. Governing Law: India. Arbitration shall be held in Delhi.",
+    "Parties: Acme Ltd, Bharat LLP. Confidentiality obligations survive. Jurisdiction lies with the courts at Mumbai. Dispute resolution by arbitration.",
+    "Nothing here matches any heading at all, even termed or determination or betweenness.",
+    "The parties_ agree. Terms apply. Governing law is the law of India; the governing-law clause names no arbitrator.",
+]
+
+
+@pytest.mark.parametrize("text", PLAIN_TEXTS)
+def test_matches_original_find_section_without_numbered_clauses(text):
+    index = SectionIndex(text)
+    all_headings = [keyword for slot in PARTIES_STOPS for keyword in SECTION_KEYWORDS[slot] if keyword not in ("confidential information", "non-disclosure")]
+    assert index.find("parties", PARTIES_STOPS) == baseline_find_section(text, ["parties", "between"], all_headings)
+    assert index.find("governing_law", ["dispute_resolution"]) == baseline_find_section(text, ["governing law", "jurisdiction"], ["dispute resolution", "arbitration"])
+    # The original search had an empty stop list for this slot and returned only the keyword; the index keeps the rest of the section.
+    assert index.find("dispute_resolution").startswith(baseline_find_section(text, ["dispute resolution", "arbitration"], []))
+
+
+def test_section_stops_at_next_numbered_clause():
+    text = "Preamble between A and B.\n1. Governing Law. Laws of India apply.\n2. Payment. Fees are due monthly.\n3. Arbitration in Delhi."
+    index = SectionIndex(text)
+    assert index.find("governing_law", ["dispute_resolution"]) == "Governing Law. Laws of India apply."
+    assert index.find("payment") == "Payment. Fees are due monthly."
+    assert index.find("dispute_resolution") == "Arbitration in Delhi."
+    assert text[index.first_clause_start():].strip().startswith("1. Governing Law.")
+
+
+def test_keyword_matching_is_case_insensitive_and_whole_word():
+    index = SectionIndex("Determined interests.\n1. TERMINATION of the Agreement.\n2. Interest at 12%.")
+    assert index.find("termination") == "TERMINATION of the Agreement."
+    assert index.find("term") == ""
+    assert index.find("interest") == "Interest at 12%."
+
+
+def test_length_changing_lowercase_falls_back_to_regex():
+    text = "İstanbul office.\nThe Term is one year."
+    assert len(text.lower()) != len(text)
+    assert SectionIndex(text).find("term") == "Term is one year."
+
+
+@pytest.mark.parametrize("language", ["en", "hi"])
+def test_reformat_fills_every_template(language):
+    text = "\n".join(make_contract_pages(3, language))
+    for template_type in ("Service Agreement", "Loan Agreement"):
+        output = reformat_contract_as_template(text, template_type, language)
+        assert output.startswith(f"## {template_type.upper()}")
+        assert "### NUMBERED CLAUSES" in output and "1. " in output
@@ -0,0 +1,69 @@
+# test_risk_rules.py
+
+from risk_rules import analyze_offline, screen_clause
+
+
+def test_pure_boilerplate_is_settled_as_low():
+    finding, decided = screen_clause("14. Entire Agreement. This Agreement constitutes the entire agreement between the Parties and supersedes all prior understandings.")
+    assert decided and finding["risk_level"] == "Low"
+
+
+def test_boilerplate_mixed_with_other_terms_goes_to_the_model():
+    clause = (
+        "18. Miscellaneous. This Agreement constitutes the entire agreement between the Parties. "
+        "The Client waives all claims for consequential, indirect or special damages of any kind whatsoever. "
+        "The Service Provider may assign this Agreement to any third party without the consent of the Client."
+    )
+    finding, decided = screen_clause(clause)
+    assert not decided
+
+
+def test_unmitigated_high_risk_is_decided():
+    finding, decided = screen_clause("7. Termination. The Company may terminate this Agreement at any time without notice.")
+    assert decided and finding["risk_level"] == "High" and finding["source"] == "rules"
+
+
+def test_mitigated_high_risk_goes_to_the_model():
+    finding, decided = screen_clause("7. Termination. Either party may terminate this Agreement at any time without notice.")
+    assert finding["risk_level"] == "High" and not decided
+
+
+def test_neutral_clause_goes_to_the_model():
+    assert screen_clause("3. The Service Provider shall deliver the monthly report by the fifth working day.") == (None, False)
+
+
+def test_hindi_rule_matches():
+    finding, decided = screen_clause("5. कर्मचारी इस अनुबंध से उत्पन्न सभी हानियों के लिए कंपनी की क्षतिपूर्ति करेगा।")
+    assert finding is not None and finding["source"] == "rules"
+
+
+def test_offline_analysis_covers_every_clause():
+    clauses = [
+        "This Agreement is made between Acme Private Limited and Bharat Services LLP on 1st January 2025.",
+        "1. The Company may terminate this Agreement at any time without notice.",
+        "2. The Service Provider shall deliver the monthly report by the fifth working day.",
+    ]
+    result = analyze_offline(clauses)
+    assert [item["clause_id"] for item in result["clause_analysis"]] == [1, 2, 3]
+    assert 1 <= result["summary_analysis"]["overall_risk_score"] <= 100
+
+
+def test_negated_unlimited_liability_goes_to_the_model():
+    assert screen_clause("9. Liability. The Supplier shall not be liable for any and all losses arising from delays caused by the Client.") == (None, False)
+
+
+def test_negated_non_compete_goes_to_the_model():
+    assert screen_clause("15. Nothing in this Agreement shall be construed as a non-compete obligation on the Service Provider.") == (None, False)
+
+
+def test_hindi_negation_follows_the_phrase():
+    assert screen_clause("9. विक्रेता का असीमित दायित्व नहीं होगा।") == (None, False)
+    finding, decided = screen_clause("9. विक्रेता का असीमित दायित्व होगा।")
+    assert decided and finding["risk_level"] == "High"
+
+
+def test_negation_inside_a_restrictive_covenant_still_counts():
+    finding, decided = screen_clause("12. The Employee shall not, directly or indirectly, engage in any business that competes with the Company for two years.")
+    assert decided and finding["identified_issue"] == "Non-compete"
+    finding, decided = screen_clause("4. There is no cap on the liability of the Vendor. The Client may request weekly reports.")
+    assert decided and finding["identified_issue"] == "Unlimited liability"
@@ -0,0 +1,82 @@
+# test_session_store.py
+
+import session_store
+from session_store import ArtifactStore
+
+
+def _store(tmp_path, **options):
+    return ArtifactStore(path=str(tmp_path / "session.sqlite3"), **options)
+
+
+def test_identical_values_share_one_copy(tmp_path):
+    store = _store(tmp_path)
+    first = store.put({"pages": ["a", "b"], "language": "en"})
+    assert store.put({"language": "en", "pages": ["a", "b"]}) != first
+    assert store.put({"pages": ["a", "b"], "language": "en"}) == first
+    stats = store.stats()
+    assert stats["puts"] == 3 and stats["dedupes"] == 1 and stats["disk_items"] == 2
+
+
+def test_values_survive_memory_eviction_and_a_new_process(tmp_path):
+    store = _store(tmp_path, memory_budget_mb=0.01)
+    refs = [store.put({"text": f"page {i} " * 200}) for i in range(10)]
+    assert store.stats()["memory_evictions"] > 0 and store.stats()["memory_bytes"] <= store.memory_budget
+    assert store.get(refs[0]) == {"text": "page 0 " * 200}
+    assert store.counters["disk_hits"] == 1
+    assert _store(tmp_path).get(refs[5]) == {"text": "page 5 " * 200}
+    assert store.get("missing", "default") == "default" and store.get(None) is None
+
+
+def test_values_larger_than_the_memory_budget_stay_on_disk(tmp_path):
+    store = _store(tmp_path, memory_budget_mb=0.001)
+    ref = store.put("x" * 5000)
+    assert store.stats()["memory_items"] == 0
+    assert store.get(ref) == "x" * 5000
+
+
+def test_derived_is_memoized_and_rebuilt_after_eviction(tmp_path):
+    store = _store(tmp_path)
+    ref = store.put(["one", "two"])
+    builds = []
+    build = lambda value: builds.append(value) or len(value)
+    assert store.derived(ref, "count", build) == 2
+    assert store.derived(ref, "count", build) == 2 and len(builds) == 1
+    store._memory.clear(); store._memory_bytes = 0
+    assert store.derived(ref, "count", build) == 2 and len(builds) == 2
+    assert store.derived("missing", "count", build) is None
+
+
+def test_disk_prune_drops_expired_then_least_recently_used(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    store = _store(tmp_path, disk_budget_mb=0.004, ttl_seconds=3600, level=0)
+    old = store.put("old " * 200)
+    clock[0] += 2 * 3600
+    refs = []
+    for i in range(3):
+        clock[0] += 1
+        refs.append(store.put(f"{i} " * 600))
+    clock[0] += 1
+    store.get(refs[0])
+    clock[0] += session_store.PRUNE_INTERVAL_SECONDS
+    refs.append(store.put("last " * 200))
+    store._memory.clear(); store._memory_bytes = 0
+    assert store.get(old) is None
+    assert store.get(refs[1]) is None
+    assert store.get(refs[0]) is not None and store.get(refs[2]) is not None and store.get(refs[3]) is not None
+    assert store.stats()["disk_evictions"] == 2
+
+
+def test_memory_hits_keep_an_artifact_in_use_on_disk(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    store = _store(tmp_path, ttl_seconds=3600)
+    ref = store.put("contract text")
+    for _ in range(120):
+        clock[0] += 60
+        assert store.get(ref) == "contract text"
+        assert store.derived(ref, "length", len) == len("contract text")
+    store.put("another upload")
+    store._memory.clear(); store._memory_bytes = 0
+    assert store.get(ref) == "contract text"
+    assert store.counters["disk_evictions"] == 0